@@ -368,7 +368,7 @@ def scan_raw_dataset(data_root: Path) -> List[FileRecord]:
     op_root = raw_dir / "office_pdf"
     out: List[FileRecord] = []
     for source_root, source_name, patterns in [
-        (jf_root, "json_features", (".json",)),
+        (jf_root, "json_features", (".json", ".jsonl")),
         (op_root, "office_pdf", tuple(SUPPORTED_EXTS)),
     ]:
         for label_name, label in [("benign", 0), ("malicious", 1)]:
@@ -400,10 +400,17 @@ def stratified_split_indices(labels: List[int], train_frac=0.7, val_frac=0.15, t
             idx_temp, y_temp, test_size=test_size, stratify=y_temp, random_state=seed
         )
     except ValueError:
-        # If a class is missing, fall back to non-stratified splits
+        # If a class is missing (or a class is too small to stratify), fall
+        # back to non-stratified splits; guard the tiny-input cases where
+        # train_test_split itself would raise on an empty resulting set
+        if len(idx) < 2:
+            return set(int(x) for x in idx), set(), set()
         idx_train, idx_temp = train_test_split(idx, test_size=(1 - train_frac), random_state=seed, shuffle=True)
         test_size = test_frac / (val_frac + test_frac)
-        idx_val, idx_test = train_test_split(idx_temp, test_size=test_size, random_state=seed, shuffle=True)
+        if len(idx_temp) < 2:
+            idx_val, idx_test = idx_temp, idx_temp[:0]
+        else:
+            idx_val, idx_test = train_test_split(idx_temp, test_size=test_size, random_state=seed, shuffle=True)
     return set(int(x) for x in idx_train), set(int(x) for x in idx_val), set(int(x) for x in idx_test)
 
 def copy_to_working(records: List[FileRecord], data_root: Path, split_map: Dict[str, set]):
@@ -433,6 +440,9 @@ def load_json_features(path: Path) -> Dict[str, float | int | bool]:
             obj = json.load(f)
     except Exception:
         return {}
+    return _coerce_feature_values(obj)
+
+def _coerce_feature_values(obj) -> Dict[str, float | int | bool]:
     if isinstance(obj, dict) and "features" in obj and isinstance(obj["features"], dict):
         obj = obj["features"]
     if not isinstance(obj, dict):
@@ -448,11 +458,58 @@ def load_json_features(path: Path) -> Dict[str, float | int | bool]:
                 pass
     return out
 
+def load_jsonl_features(path: Path) -> List[Tuple[str | None, Dict[str, float | int | bool]]]:
+    """One (hash, features) pair per line of a JSON-lines feature file."""
+    out: List[Tuple[str | None, Dict[str, float | int | bool]]] = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except Exception:
+                    continue
+                feats = _coerce_feature_values(obj)
+                if feats:
+                    h = obj.get("hash") if isinstance(obj, dict) else None
+                    out.append((str(h) if h else None, feats))
+    except Exception:
+        pass
+    return out
+
+def _row_split(file_id: str, train_frac=0.70, val_frac=0.15) -> str:
+    """Deterministic per-row split from a stable hash of the row id."""
+    u = int(hashlib.md5(file_id.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+    if u < train_frac:
+        return "train"
+    if u < train_frac + val_frac:
+        return "val"
+    return "test"
+
 def build_feature_table(records: List[FileRecord], split_map: Dict[str, set]) -> Tuple[pd.DataFrame, pd.Series, pd.Series]:
     rows, y, split_col = [], [], []
     for i, rec in enumerate(tqdm(records, desc="Extracting features")):
         path = Path(rec.path)
         feats: Dict[str, float | int | bool] = {}
+        if rec.source == "json_features" and path.suffix.lower() == ".jsonl":
+            # one record per line; rows inherit the file's label but are
+            # split individually — a jsonl file holds a whole class, so
+            # inheriting the file's split would dump that entire class into
+            # one split and leave train/val single-class
+            for j, (h, jf) in enumerate(load_jsonl_features(path)):
+                row: Dict[str, float | int | bool] = dict(jf)
+                row["label"] = int(rec.label)
+                row["source_is_json"] = 1
+                row["source_is_office"] = 0
+                row["file_ext"] = ".json"
+                fid = h or f"{rec.file_id}:{j}"
+                row["file_id"] = fid
+                rows.append(row)
+                y.append(int(rec.label))
+                split_col.append(_row_split(fid))
+            continue
         if rec.source == "json_features" and path.suffix.lower() == ".json":
             feats.update(load_json_features(path))
             if not feats:
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from pathlib import Path
-import shutil, zipfile, tempfile, io
+import os, shutil, zipfile, tempfile, io
 import lxml.etree as ET
 
 def sanitize_ooxml(in_path: Path | str, out_path: Path | str):
@@ -10,41 +10,46 @@ def sanitize_ooxml(in_path: Path | str, out_path: Path | str):
     if suffix not in (".docx",".pptx",".xlsx"):
         shutil.copy(in_path, out_path); return {"status":"noop","notes":["Not OOXML"]}
     
-    with tempfile.TemporaryDirectory() as td:
-        tmp = Path(td)/"work.zip"
-        shutil.copy(in_path, tmp)
-        
-        try:
-            with zipfile.ZipFile(tmp, 'r') as zin:
-                with zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED) as zout:
-                    for item in zin.infolist():
-                        data = zin.read(item.filename)
-                        
-                        # drop vba projects & embedded binaries
-                        if item.filename.endswith(("vbaProject.bin","vbaProjectSignature.bin")): continue
-                        if "/embeddings/" in item.filename.lower(): continue
-                        
-                        if item.filename.endswith(".rels"):
-                            try:
-                                root = ET.fromstring(data)
-                                changed = False
-                                # remove external relationships
-                                for rel in list(root):
-                                    t = rel.get("Type","")
-                                    target = rel.get("Target","")
-                                    mode = rel.get("TargetMode")
-                                    if mode == "External" or "externalLink" in target:
-                                        root.remove(rel)
-                                        changed = True
-                                if changed:
-                                    data = ET.tostring(root, xml_declaration=True, encoding="utf-8")
-                            except Exception:
-                                pass
-                        zout.writestr(item, data)
-        except Exception as e:
-            # If zip operation fails (corrupted), copy original but it will likely still be malicious
-            shutil.copy(in_path, out_path)
-            return {"status":"failed", "error": str(e)}
+    # Open the input zip directly — the old tempdir copy was a full-file
+    # write+read per call with no benefit. Write to a sibling tmp file and
+    # os.replace at the end so out_path may safely equal in_path.
+    tmp_out = out_path.with_suffix(out_path.suffix + ".tmp")
+    try:
+        with zipfile.ZipFile(str(in_path), 'r') as zin:
+            with zipfile.ZipFile(tmp_out, "w", zipfile.ZIP_DEFLATED) as zout:
+                for item in zin.infolist():
+                    data = zin.read(item.filename)
+
+                    # drop vba projects & embedded binaries
+                    if item.filename.endswith(("vbaProject.bin","vbaProjectSignature.bin")): continue
+                    if "/embeddings/" in item.filename.lower(): continue
+
+                    # cheap byte-scan first: most .rels have no external rels,
+                    # so skip the parse+serialize round-trip entirely
+                    if item.filename.endswith(".rels") and (
+                            b"TargetMode" in data or b"externalLink" in data):
+                        try:
+                            root = ET.fromstring(data)
+                            changed = False
+                            # remove external relationships
+                            for rel in list(root):
+                                t = rel.get("Type","")
+                                target = rel.get("Target","")
+                                mode = rel.get("TargetMode")
+                                if mode == "External" or "externalLink" in target:
+                                    root.remove(rel)
+                                    changed = True
+                            if changed:
+                                data = ET.tostring(root, xml_declaration=True, encoding="utf-8")
+                        except Exception:
+                            pass
+                    zout.writestr(item, data)
+        os.replace(tmp_out, out_path)
+    except Exception as e:
+        # If zip operation fails (corrupted), copy original but it will likely still be malicious
+        tmp_out.unlink(missing_ok=True)
+        shutil.copy(in_path, out_path)
+        return {"status":"failed", "error": str(e)}
 
     return {"status":"ok","notes":["Removed external links, VBA, and embedded objects"]}
 
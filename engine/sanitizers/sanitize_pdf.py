@@ -24,55 +24,74 @@ except Exception as e:
 def _sha256(b: bytes) -> str:
     h = hashlib.sha256(); h.update(b); return h.hexdigest()
 
-def _sanitize_with_pikepdf(in_path: Path, out_path: Path) -> Dict[str, Any]:
+# Dangerous keys and action subtypes to hunt for (module-level frozensets for
+# O(1) membership in the per-key hot loop)
+_DANGEROUS_KEYS = frozenset((
+    "/AA", "/OpenAction", "/JS", "/JavaScript", "/Launch", "/SubmitForm",
+    "/ImportData", "/RichMedia", "/RichMediaContent",
+))
+_BAD_ACTION_SUBTYPES = frozenset(("/JavaScript", "/Launch", "/SubmitForm", "/ImportData"))
+# Pre-resolved stat bucket per key, so the walker skips the substring test
+_KEY_STAT_BUCKET = {k: ("js" if "JS" in k or "Script" in k else "actions") for k in _DANGEROUS_KEYS}
+
+def _clean_pdf_objects(pdf) -> tuple:
     """
-    Recursively remove JS and Actions from ALL objects using QPDF/pikepdf.
+    Remove JS and Actions from ALL objects of an open pikepdf.Pdf.
     This finds threats hidden deep in the PDF structure.
     """
     removed = []
     stats = {"js": 0, "actions": 0, "annotations": 0}
-    
-    with pikepdf.open(str(in_path), allow_overwriting_input=True) as pdf:
-        # Define dangerous keys and values to hunt for
-        DANGEROUS_KEYS = ["/AA", "/OpenAction", "/JS", "/JavaScript", "/Launch", "/SubmitForm", "/ImportData", "/RichMedia", "/RichMediaContent"]
-        
-        # Recursive walker to clean any dictionary object found
-        def clean_object(obj, path=""):
-            if isinstance(obj, pikepdf.Dictionary):
-                # 1. Check for dangerous keys
-                for key in list(obj.keys()):
-                    if key in DANGEROUS_KEYS:
-                        del obj[key]
-                        removed.append(f"{path}{key}")
-                        stats["js" if "JS" in key or "Script" in key else "actions"] += 1
-                
-                # 2. Check for dangerous Actions (/A)
-                if "/A" in obj:
-                    action = obj.get("/A")
-                    if isinstance(action, pikepdf.Dictionary) and "/S" in action:
-                        subtype = str(action.get("/S"))
-                        if subtype in ["/JavaScript", "/Launch", "/SubmitForm", "/ImportData"]:
-                            del obj["/A"]
-                            removed.append(f"{path}/A{subtype}")
-                            stats["actions"] += 1
-
-                # Recurse into children
-                for key, val in obj.items():
-                    # Limit recursion depth implicitly by object graph structure
-                    clean_object(val, f"{path}{key}/")
-            
-            elif isinstance(obj, pikepdf.Array):
-                for i, item in enumerate(obj):
-                    clean_object(item, f"{path}[{i}]/")
-
-        # Start recursion from Root
-        clean_object(pdf.root, "Root")
-
-        # Also iterate over all objects in the PDF body to catch unlinked but present threats
-        # (This is expensive but thorough)
-        for obj in pdf.objects:
-             clean_object(obj, "Obj")
 
+    # Iterative walker to clean any dictionary object found.
+    # A visited set keyed by objgen keeps shared indirect objects from being
+    # re-entered along every reference path (exponential on cross-referenced PDFs)
+    # and avoids Python recursion limits on deep object graphs.
+    stack = [(pdf.root, "Root")]
+    # Seed the worklist with every object in the body to catch unlinked threats
+    stack.extend((obj, "Obj") for obj in pdf.objects)
+    seen = set()
+
+    while stack:
+        obj, path = stack.pop()
+
+        # Dedupe before the type dispatch: indirect arrays cycle too, and a
+        # self-referencing array would otherwise loop this walker forever
+        objgen = getattr(obj, "objgen", None)
+        if objgen is not None and objgen != (0, 0):
+            if objgen in seen:
+                continue
+            seen.add(objgen)
+
+        if isinstance(obj, pikepdf.Dictionary):
+            # 1. Check for dangerous keys
+            for key in list(obj.keys()):
+                if key in _DANGEROUS_KEYS:
+                    del obj[key]
+                    removed.append(f"{path}{key}")
+                    stats[_KEY_STAT_BUCKET[key]] += 1
+
+            # 2. Check for dangerous Actions (/A)
+            if "/A" in obj:
+                action = obj.get("/A")
+                if isinstance(action, pikepdf.Dictionary) and "/S" in action:
+                    subtype = str(action.get("/S"))
+                    if subtype in _BAD_ACTION_SUBTYPES:
+                        del obj["/A"]
+                        removed.append(f"{path}/A{subtype}")
+                        stats["actions"] += 1
+
+            # Push children
+            stack.extend((val, f"{path}{key}/") for key, val in obj.items())
+
+        elif isinstance(obj, pikepdf.Array):
+            stack.extend((item, f"{path}[{i}]/") for i, item in enumerate(obj))
+
+    return removed, stats
+
+def _sanitize_with_pikepdf(in_path: Path, out_path: Path) -> Dict[str, Any]:
+    """Clean a PDF on disk with pikepdf and write the sanitized file to out_path."""
+    with pikepdf.open(str(in_path), allow_overwriting_input=True) as pdf:
+        removed, stats = _clean_pdf_objects(pdf)
         # Save with full rewrite to purge deleted data
         pdf.save(str(out_path), object_stream_mode=pikepdf.ObjectStreamMode.generate)
 
@@ -84,6 +103,41 @@ def _sanitize_with_pikepdf(in_path: Path, out_path: Path) -> Dict[str, Any]:
         "stats": stats
     }
 
+def _sanitize_with_pikepdf_io(src: io.BytesIO, dst: io.BytesIO) -> Dict[str, Any]:
+    """In-memory variant: pikepdf accepts file-like objects, so no tempfiles."""
+    with pikepdf.open(src) as pdf:
+        removed, stats = _clean_pdf_objects(pdf)
+        pdf.save(dst, object_stream_mode=pikepdf.ObjectStreamMode.generate)
+
+    return {
+        "status": "ok",
+        "sanitized_file": None,
+        "removed": list(set(removed)),
+        "notes": ["Sanitized with pikepdf (Recursive, in-memory)"],
+        "stats": stats
+    }
+
+def _clean_page(page, removed: List[str], stats: Dict[str, int]) -> None:
+    """Strip auto-actions and risky annotations from a single page."""
+    if "/AA" in page:
+        del page["/AA"]; removed.append("Page.AA")
+
+    # Annotations (Surgical)
+    if "/Annots" in page:
+        try:
+            annots = page["/Annots"]
+            if isinstance(annots, list):
+                safe = []
+                for a in annots:
+                    a_obj = a.get_object() if hasattr(a, "get_object") else a
+                    if not any(k in a_obj for k in ["/JavaScript", "/JS", "/AA"]):
+                        safe.append(a)
+                    else:
+                        stats["annotations"] += 1
+                if len(safe) < len(annots):
+                    page[NameObject("/Annots")] = ArrayObject(safe)
+        except Exception: pass
+
 def _sanitize_with_pypdf(in_path: Path, out_path: Path) -> Dict[str, Any]:
     """Fallback: Rebuild PDF with PyPDF2 (More thorough but riskier for complex docs)"""
     removed: List[str] = []
@@ -103,26 +157,13 @@ def _sanitize_with_pypdf(in_path: Path, out_path: Path) -> Dict[str, Any]:
              del root["/Names"]["/JavaScript"]; removed.append("Names.JavaScript")
 
     # Pages
+    # NOTE: kept serial on purpose. Pages share indirect objects through one
+    # reader/QPDF instance, and neither PyPDF2 nor pikepdf allows concurrent
+    # mutation of a single document, so a ThreadPoolExecutor here corrupts
+    # state rather than speeding it up. The objgen-deduped walk in
+    # _clean_pdf_objects already visits each object once.
     for page in reader.pages:
-        if "/AA" in page:
-             del page["/AA"]; removed.append("Page.AA")
-        
-        # Annotations (Surgical)
-        if "/Annots" in page:
-            try:
-                annots = page["/Annots"]
-                if isinstance(annots, list):
-                    safe = []
-                    for a in annots:
-                         a_obj = a.get_object() if hasattr(a, "get_object") else a
-                         if not any(k in a_obj for k in ["/JavaScript", "/JS", "/AA"]):
-                             safe.append(a)
-                         else:
-                             stats["annotations"] += 1
-                    if len(safe) < len(annots):
-                        page[NameObject("/Annots")] = ArrayObject(safe)
-            except Exception: pass
-        
+        _clean_page(page, removed, stats)
         writer.add_page(page)
 
     with open(out_path, "wb") as f:
@@ -155,6 +196,17 @@ def sanitize_pdf(in_path: str | Path, out_path: str | Path):
          return {"status": "failed", "error": str(e)}
 
 def sanitize_pdf_bytes(data: bytes) -> bytes:
+    # Fast path: keep everything in memory, pikepdf reads/writes file-like objects
+    if pikepdf:
+        try:
+            dst = io.BytesIO()
+            res = _sanitize_with_pikepdf_io(io.BytesIO(data), dst)
+            if res["status"] == "ok":
+                return dst.getvalue()
+        except Exception:
+            pass
+
+    # PyPDF2 fallback needs real files; only then pay the tempfile round-trip
     with tempfile.TemporaryDirectory() as td:
         ip = Path(td) / "in.pdf"
         op = Path(td) / "out.pdf"
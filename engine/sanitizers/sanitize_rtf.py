@@ -2,20 +2,25 @@ from __future__ import annotations
 from pathlib import Path
 import re, shutil, io
 
+# RTF control words are ASCII and lowercase by spec, so the patterns run on the
+# raw bytes with no IGNORECASE (case-folding doubles DFA states) and no
+# latin-1 decode/encode round-trip.
+RE_OBJECT_BLOCK = re.compile(rb"\\object\b.*?\\endobj\b", re.DOTALL)
+RE_SUSPICIOUS_CTRL = re.compile(rb"\\(?:objdata|objclass|field|pict)\b")
+
+def _scrub_rtf(data: bytes) -> bytes:
+    # drop \object blocks and suspicious control words
+    # e.g. {\object ... \objdata ... }
+    data = RE_OBJECT_BLOCK.sub(b"", data)
+    data = RE_SUSPICIOUS_CTRL.sub(b"", data)
+    return data
+
 def sanitize_rtf(in_path: Path | str, out_path: Path | str):
     """Remove object embeds and suspicious control words from RTF."""
     in_path = Path(in_path); out_path = Path(out_path)
     try:
-        # Use latin-1 to avoid encoding issues with binary RTF data
         data = in_path.read_bytes()
-        txt = data.decode("latin-1", errors="ignore")
-        
-        # drop \object blocks and suspicious control words
-        # e.g. {\object ... \objdata ... }
-        txt = re.sub(r"\\object\b.*?\\endobj\b", "", txt, flags=re.IGNORECASE|re.DOTALL)
-        txt = re.sub(r"\\(objdata|objclass|field|pict)\b", "", txt, flags=re.IGNORECASE)
-        
-        out_path.write_text(txt, encoding="latin-1")
+        out_path.write_bytes(_scrub_rtf(data))
         return {"status":"ok","notes":["Removed RTF object blocks and embeds"]}
     except Exception as e:
         shutil.copy(in_path, out_path)
@@ -24,9 +29,6 @@ def sanitize_rtf(in_path: Path | str, out_path: Path | str):
 def sanitize_rtf_bytes(data: bytes) -> bytes:
     """Bytes wrapper for RTF sanitization"""
     try:
-        txt = data.decode("latin-1", errors="ignore")
-        txt = re.sub(r"\\object\b.*?\\endobj\b", "", txt, flags=re.IGNORECASE|re.DOTALL)
-        txt = re.sub(r"\\(objdata|objclass|field|pict)\b", "", txt, flags=re.IGNORECASE)
-        return txt.encode("latin-1")
+        return _scrub_rtf(data)
     except Exception:
         return data
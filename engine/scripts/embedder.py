@@ -1,11 +1,39 @@
 from sentence_transformers import SentenceTransformer
 import numpy as np
+import torch
 
 class FrozenMiniLM:
     def __init__(self, name="sentence-transformers/all-MiniLM-L6-v2", device=None):
-        self.model = SentenceTransformer(name, device=device)
-        self.model.eval()
+        # ONNX Runtime fuses LayerNorm/GELU and runs a frozen encoder ~2-4x
+        # faster; needs the onnx extra of sentence-transformers, so best
+        # effort with the plain torch backend as fallback
+        self._onnx = False
+        try:
+            import onnxruntime  # noqa: F401 — fail fast when ORT is absent
+            self.model = SentenceTransformer(name, device=device, backend="onnx")
+            self._onnx = True
+        except Exception:
+            self.model = SentenceTransformer(name, device=device)
+        try:
+            self.model.eval()
+        except Exception:
+            pass
+        # Frozen inference-only encoder: on CPU, dynamic int8 quantization
+        # roughly halves Linear-layer time with negligible embedding drift
+        # (torch backend only; the ONNX graph is already optimized)
+        if not self._onnx and self.model.device.type == "cpu":
+            try:
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8)
+            except Exception:
+                pass
+
+    def encode_texts(self, texts, batch_size=64) -> np.ndarray:
+        # mean-pooled, L2-normalized (N, 384); one batched call amortizes
+        # tokenizer and kernel-launch overhead across all segments
+        with torch.inference_mode():
+            return self.model.encode(list(texts), convert_to_numpy=True,
+                                     normalize_embeddings=True, batch_size=batch_size)
 
     def encode_text(self, text: str) -> np.ndarray:
-        # mean-pooled, L2-normalized 384-d
-        return self.model.encode([text], convert_to_numpy=True, normalize_embeddings=True, batch_size=64)[0]
+        return self.encode_texts([text])[0]
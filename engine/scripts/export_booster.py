@@ -0,0 +1,71 @@
+"""One-shot export: lightgbm_calibrated.pkl -> model.txt (+ calibration.json).
+
+The predict-only CLI prefers the Booster text file when present, which
+skips joblib unpickling and the sklearn wrapper graph on every cold
+start. The calibration map is sampled onto interp knots so the CLI can
+apply it with a single np.interp instead of loading the calibrator.
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import joblib
+
+
+def _calibration_curve(calibrator, n: int = 201):
+    """Sample the prob->prob calibration map of a CalibratedClassifierCV.
+
+    Works for both isotonic and sigmoid calibrators: with a predict_proba
+    base estimator they take the positive-class probability as input.
+    Averages across CV folds when the calibrator holds more than one.
+    """
+    if calibrator is None:
+        return None
+    xs = np.linspace(0.0, 1.0, n)
+    curves = []
+    for cc in getattr(calibrator, "calibrated_classifiers_", []):
+        cals = getattr(cc, "calibrators", None) or getattr(cc, "calibrators_", None) or []
+        for cal in cals:
+            try:
+                curves.append(np.asarray(cal.predict(xs), dtype=np.float64))
+            except Exception:
+                pass
+    if not curves:
+        return None
+    ys = np.clip(np.mean(curves, axis=0), 0.0, 1.0)
+    return {"x": xs.tolist(), "y": ys.tolist()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export the calibrated LightGBM bundle to a raw Booster file")
+    ap.add_argument("--model-dir", required=True, help="Folder containing lightgbm_calibrated.pkl")
+    args = ap.parse_args()
+
+    mdir = Path(args.model_dir)
+    bundle_path = mdir / "lightgbm_calibrated.pkl"
+    if not bundle_path.exists():
+        raise SystemExit(f"[ERROR] {bundle_path} not found")
+    bundle = joblib.load(bundle_path)
+
+    model = bundle.get("model") if isinstance(bundle, dict) else bundle
+    calibrator = bundle.get("calibrator") if isinstance(bundle, dict) else None
+    booster = getattr(model, "booster_", model)
+    if not hasattr(booster, "save_model"):
+        raise SystemExit("[ERROR] Bundle does not contain a LightGBM model")
+
+    out_model = mdir / "model.txt"
+    booster.save_model(str(out_model))
+    print(f"Saved {out_model}")
+
+    curve = _calibration_curve(calibrator)
+    if curve is not None:
+        out_cal = mdir / "calibration.json"
+        out_cal.write_text(json.dumps(curve), encoding="utf-8")
+        print(f"Saved {out_cal} ({len(curve['x'])} knots)")
+    else:
+        print("No calibrator found; raw Booster probabilities will be used as-is.")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,3 +9,35 @@ class MLPHead(nn.Module):
         )
     def forward(self, x):  # x: (B, 384)
         return self.net(x).squeeze(-1)
+
+def load_for_inference(path, device=None):
+    """Load a trained MLPHead optimized for scoring, not training.
+
+    The two Linears (384->128->1) are tiny and memory-bound on weight fetch,
+    so on CPU we dynamically quantize them to int8 (quarter the weight bytes);
+    on GPU we cast to half. Callers should wrap scoring in
+    torch.inference_mode() and feed .half() inputs on GPU.
+    """
+    m = MLPHead()
+    state = torch.load(str(path), map_location="cpu")
+    if isinstance(state, dict) and "state_dict" in state:
+        state = state["state_dict"]
+    if isinstance(state, dict):
+        m.load_state_dict(state, strict=False)
+    else:
+        m = state
+    m.eval()
+    if device and str(device).startswith("cuda"):
+        return m.half().to(device)
+    try:
+        return torch.quantization.quantize_dynamic(m, {nn.Linear}, dtype=torch.qint8)
+    except Exception:
+        return m  # quantized kernels unavailable on this build
+
+@torch.inference_mode()
+def score(model, x):
+    """Sigmoid probability for a (B, 384) float tensor; no autograd bookkeeping."""
+    p = next(model.parameters(), None)
+    if p is not None and p.dtype == torch.float16:
+        x = x.half()
+    return torch.sigmoid(model(x))
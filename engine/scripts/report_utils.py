@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import Any, Dict, List, Tuple
 from pathlib import Path
-import json, numpy as np, joblib
+import json, weakref, numpy as np, joblib
 
 # optional torch for DL head
 try:
@@ -53,13 +53,28 @@ def load_feature_order(models_dir: Path) -> List[str]:
 def load_feat_order(models_dir: Path) -> List[str]:
     return load_feature_order(models_dir)
 
+# memoized per object: the same bundle is unwrapped on every prob/shap call
+_AS_EST_CACHE: Dict[int, Any] = {}
+
 def _as_estimator(obj: Any):
     if obj is None: return None
+    oid = id(obj)
+    if oid in _AS_EST_CACHE: return _AS_EST_CACHE[oid]
+    est = _find_estimator(obj)
+    try:
+        # only cache weakref-able objects so a reused id can never alias
+        weakref.finalize(obj, _AS_EST_CACHE.pop, oid, None)
+        _AS_EST_CACHE[oid] = est
+    except TypeError:
+        pass
+    return est
+
+def _find_estimator(obj: Any):
     if hasattr(obj,"predict_proba"): return obj
     if isinstance(obj, dict):
         for k in ("calibrated","model","estimator","clf","pipeline","best_estimator_","base_estimator"):
             if k in obj:
-                est = _as_estimator(obj[k]); 
+                est = _as_estimator(obj[k]);
                 if est is not None: return est
         for v in obj.values():
             est = _as_estimator(v)
@@ -78,7 +93,9 @@ def _as_estimator(obj: Any):
     return None
 
 def _vectorize(feats: Dict[str,float], order: List[str]) -> np.ndarray:
-    return np.asarray([[feats.get(n,0.0) for n in order]], dtype=float)
+    # float32 halves bandwidth through predict; LightGBM converts to float32 anyway
+    return np.fromiter((feats.get(n,0.0) for n in order),
+                       dtype=np.float32, count=len(order)).reshape(1,-1)
 
 def _safe_prob(p): 
     a=np.asarray(p); 
@@ -141,14 +158,34 @@ def findings_from_meta(meta: Dict[str,Any]) -> List[Dict[str,str]]:
         it.append({"threat_type":"No active threats","severity":"low","indicator":"No dangerous constructs found","action_taken":"N/A"})
     return it
 
+# explainer construction dominates SHAP latency for tree models; build once
+# per (estimator, feature order) and reuse across calls
+_SHAP_CACHE: Dict[Tuple[int, Tuple[str, ...]], Any] = {}
+
+def _get_explainer(est: Any, order: List[str]):
+    key = (id(est), tuple(order))
+    explainer = _SHAP_CACHE.get(key)
+    if explainer is None:
+        try:
+            explainer = shap.TreeExplainer(est)
+        except Exception:
+            explainer = shap.Explainer(est, feature_names=order)
+        _SHAP_CACHE[key] = explainer
+    return explainer
+
 def shap_top(est_obj: Any, feats: Dict[str,float], order: List[str], k: int = 6):
     if not SHAP_OK: return {"support": False}
     est=_as_estimator(est_obj)
     if est is None: return {"support": False}
     try:
         x = _vectorize(feats, order)
-        explainer = shap.Explainer(est, feature_names=order)
-        values = explainer(x).values[0]  # SHAP contributions per feature
+        explainer = _get_explainer(est, order)
+        if hasattr(explainer, "shap_values"):
+            values = explainer.shap_values(x)
+            if isinstance(values, list): values = values[-1]  # binary: class-1 slice
+            values = np.asarray(values).reshape(-1)[:len(order)]
+        else:
+            values = explainer(x).values[0]  # SHAP contributions per feature
         pairs = list(zip(order, values))
         pairs.sort(key=lambda t: t[1], reverse=True)
         pos = [{"name":n,"shap":float(v)} for n,v in pairs if v>0][:k]
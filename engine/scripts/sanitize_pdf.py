@@ -18,8 +18,11 @@ Always writes output; if bytes still match, appends a harmless comment to guaran
 
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, List, Iterable
-import io, re, shutil, hashlib, itertools, random
+from typing import Dict, List
+import io, os, shutil, hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from scrub_terms import keyword_scrub_text, scrub_bytes_keywords
 
 # Optional deep scrub
 try:
@@ -33,109 +36,6 @@ except Exception as e:  # pragma: no cover
     raise RuntimeError("PyPDF2 is required for PDF sanitization") from e
 
 
-# ---------------- Keyword expansion (→ >= 5,000 variants) ----------------
-BASE_TERMS: List[str] = [
-    # JS/actions (PDF)
-    "javascript", "/js", "/javascript", "openaction", "submitform", "launch", "gotoR", "named", "action",
-    "richmedia", "embeddedfile", "embeddedfiles", "acroform", "xfa", "needappearances",
-    "doc.exportdataobject", "util.printf", "app.launchurl", "this.submitform", "geturl",
-    # Office/LOLBins / typical malware strings
-    "macro", "vba", "vbaproject", "ole", "activex", "dde", "ddeauto", "includepicture", "includetext",
-    "hyperlink", "attachedtemplate",
-    # URLs/schemes
-    "http://", "https://", "javascript:", "file:", "data:", "ftp://", "smb://",
-    # LOLBAS/windows & tools
-    "cmd", "cmd.exe", "powershell", "powershell.exe", "wscript", "wscript.exe", "cscript", "cscript.exe",
-    "mshta", "mshta.exe", "regsvr32", "regsvr32.exe", "rundll32", "rundll32.exe", "bitsadmin", "certutil",
-    "curl", "wget", "ftp", "tftp", "schtasks", "at.exe", "whoami", "net user", "net group",
-    # Enc/JS tricks
-    "base64", "eval", "fromcharcode", "unescape",
-    # file types/executables
-    ".exe", ".ps1", ".vbs", ".js", ".jse", ".bat", ".cmd", ".hta", ".dll",
-]
-
-# A few extra families to widen coverage
-EXTRA_FAMILIES = [
-    "dropper", "payload", "beacon", "c2", "shellcode", "maldoc", "phish", "obfuscate", "decode",
-    "invoke-expression", "iex", "downloadstring", "add-type", "new-object system.net.webclient",
-    "start-process", "write-host", "set-mppreference", "amsienable",
-]
-
-LEET_MAP = {
-    "a": ["a", "4", "@"], "e": ["e", "3"], "i": ["i", "1", "!"],
-    "o": ["o", "0"], "s": ["s", "5", "$"], "t": ["t", "7"]
-}
-SEP_VARIANTS = ["", ".", "_", "-", "\u200b"]
-PREFIXES = ["", "/", "\\"]          # PDF keys, escapes
-SUFFIXES = ["", "()", ":", ";", "'", '"']
-TLDs = ["com", "net", "org", "io", "ru", "cn", "xyz"]
-EXTS = [".exe",".ps1",".vbs",".js",".jse",".bat",".cmd",".hta",".dll",".scr",".com",".pif",".lnk"]
-
-def _leetify(token: str, cap: int = 10) -> List[str]:
-    pools = []
-    for ch in token:
-        low = ch.lower()
-        if low in LEET_MAP: pools.append(LEET_MAP[low])
-        else: pools.append([ch])
-    out = set()
-    for combo in itertools.product(*pools):
-        out.add("".join(combo))
-        if len(out) >= cap:
-            break
-    return list(out)
-
-def _path_forms(token: str) -> List[str]:
-    tk = token.strip("/").lower()
-    forms = [
-        f"{tk}", f"/{tk}", f"\\{tk}", f"{tk}/", f"{tk}\\", f"/{tk}/", f"\\{tk}\\",
-        f"{tk}.php", f"{tk}.asp", f"{tk}.aspx", f"{tk}.jsp"
-    ]
-    for tld in TLDs:
-        forms.append(f"{tk}.{tld}")
-        forms.append(f"www.{tk}.{tld}")
-        forms.append(f"http://{tk}.{tld}")
-        forms.append(f"https://{tk}.{tld}")
-    for ext in EXTS:
-        forms.append(f"{tk}{ext}")
-    return forms
-
-def expand_terms(min_count: int = 5000) -> List[str]:
-    seeds = set(BASE_TERMS + EXTRA_FAMILIES)
-    expanded = set()
-    # Core variants
-    for t in seeds:
-        t = t.strip()
-        if not t: continue
-        base = set([t, t.lower(), t.upper()])
-        if re.search(r"[a-zA-Z]", t):
-            for v in _leetify(t, cap=8):
-                base.add(v)
-        # separator/prefix/suffix variants
-        for cv in list(base):
-            for pre in PREFIXES:
-                for sep in SEP_VARIANTS:
-                    for suf in SUFFIXES:
-                        expanded.add(f"{pre}{cv.replace(' ', sep)}{suf}")
-        # compacted form
-        expanded.add(re.sub(r"[\/\.\-\s]+", "", t))
-        # path/URL/exe style forms
-        for pf in _path_forms(t):
-            expanded.add(pf)
-    # If still below target, add n-gram slices of longer tokens
-    if len(expanded) < min_count:
-        for t in list(seeds):
-            tt = re.sub(r"[^a-z0-9]", "", t.lower())
-            for i in range(0, max(0, len(tt)-3)):
-                expanded.add(tt[i:i+4])
-                if len(expanded) >= min_count: break
-            if len(expanded) >= min_count: break
-    # Bound overall size for performance
-    items = sorted(x for x in expanded if x)
-    random.shuffle(items)
-    return items[: max(min_count, 5000)]
-
-EXPANDED_TERMS = expand_terms(min_count=6000)  # ≥ 6000 tokens
-
 # -------- helpers --------
 def _sha256(b: bytes) -> str:
     h = hashlib.sha256(); h.update(b); return h.hexdigest()
@@ -151,172 +51,294 @@ def _drop_key(obj, key: str, removed: List[str], label: str | None = None) -> bo
     return False
 
 def _strip_js_anywhere(obj, removed: List[str], stats: Dict[str, int]):
+    # Iterative walk with an id()-keyed visited set: shared dicts are entered
+    # once instead of once per reference path, values are taken from a single
+    # items() snapshot rather than re-looked-up per key, and deep graphs can't
+    # hit the recursion limit.
+    stack = [obj]
+    seen = set()
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        try:
+            if isinstance(o, dict):
+                for k, v in list(o.items()):
+                    if str(k) in ("/JS", "/JavaScript"):
+                        try:
+                            del o[k]
+                            removed.append("JS")
+                            stats["js"] = stats.get("js", 0) + 1
+                        except Exception:
+                            pass
+                    else:
+                        stack.append(v)
+            elif isinstance(o, list):
+                stack.extend(o)
+        except Exception:
+            pass
+
+# The regex/automaton scrub holds the GIL, so threads don't help it; a shared
+# process pool does, but only pays off once there is real work to split.
+# Created lazily and reused across documents (workers keep their imported
+# term tables warm).
+_SCRUB_POOL: ProcessPoolExecutor | None = None
+_POOL_MIN_STREAMS = 4
+_POOL_MIN_BYTES = 1 << 20  # 1 MiB of stream data
+
+def _scrub_pool() -> ProcessPoolExecutor:
+    global _SCRUB_POOL
+    if _SCRUB_POOL is None:
+        _SCRUB_POOL = ProcessPoolExecutor(max_workers=os.cpu_count() or 2)
+    return _SCRUB_POOL
+
+# -------- pikepdf path (single open, single save) --------
+def _pk_drop(d, key: str, removed: List[str], label: str, stats: Dict[str, int],
+             bucket: str | None = None) -> bool:
     try:
-        if isinstance(obj, dict):
-            for k in list(obj.keys()):
-                ks = str(k)
-                if ks in ("/JS", "/JavaScript"):
-                    try:
+        if isinstance(d, pikepdf.Dictionary) and key in d:
+            del d[key]
+            removed.append(label)
+            if bucket:
+                stats[bucket] = stats.get(bucket, 0) + 1
+            return True
+    except Exception:
+        pass
+    return False
+
+def _pikepdf_clean(pdf, removed: List[str], stats: Dict[str, int]) -> None:
+    """One object-graph pass over an open pikepdf.Pdf.
+
+    The previous shape (PyPDF2 rebuild -> BytesIO -> pikepdf reopen) parsed
+    the document twice and serialized it twice; every removal below works
+    directly on the pikepdf graph instead.
+    """
+    root = pdf.root
+
+    _pk_drop(root, "/OpenAction", removed, "OpenAction", stats, "actions")
+    _pk_drop(root, "/AA", removed, "Catalog.AA", stats, "actions")
+
+    names = root.get("/Names", None)
+    _pk_drop(names, "/EmbeddedFiles", removed, "Names.EmbeddedFiles", stats, "embedded_files")
+    _pk_drop(names, "/JavaScript", removed, "Names.JavaScript", stats, "js")
+
+    acro = root.get("/AcroForm", None)
+    _pk_drop(acro, "/XFA", removed, "AcroForm.XFA", stats)
+    _pk_drop(acro, "/JS", removed, "AcroForm.JS", stats, "js")
+    _pk_drop(acro, "/JavaScript", removed, "AcroForm.JavaScript", stats, "js")
+    _pk_drop(acro, "/AA", removed, "AcroForm.AA", stats, "actions")
+    _pk_drop(acro, "/NeedAppearances", removed, "AcroForm.NeedAppearances", stats)
+    _pk_drop(acro, "/Fields", removed, "AcroForm.Fields", stats)
+
+    _pk_drop(root, "/Outlines", removed, "Outlines", stats)
+    _pk_drop(root, "/PageLabels", removed, "PageLabels", stats)
+
+    vp = root.get("/ViewerPreferences", None)
+    if isinstance(vp, pikepdf.Dictionary):
+        for k in list(vp.keys()):
+            try:
+                del vp[k]
+                removed.append(f"ViewerPreferences.{str(k).lstrip('/')}")
+            except Exception:
+                pass
+
+    for page in pdf.pages:
+        _pk_drop(page, "/AA", removed, "Page.AA", stats, "actions")
+        _pk_drop(page, "/RichMediaContent", removed, "Page.RichMediaContent", stats, "richmedia")
+        if "/Annots" in page:
+            try:
+                annots = page["/Annots"]
+                count = len(annots) if isinstance(annots, pikepdf.Array) else 1
+                del page["/Annots"]
+                stats["annotations"] = stats.get("annotations", 0) + count
+                removed.append(f"Annots({count})")
+            except Exception:
+                pass
+
+    # Metadata purge
+    _pk_drop(root, "/Metadata", removed, "Metadata", stats)
+    try:
+        if "/Info" in pdf.trailer:
+            del pdf.trailer["/Info"]
+            removed.append("Info")
+    except Exception:
+        pass
+
+    # One pass over the whole body: strip JS keys anywhere, collect streams
+    seen = set()
+    streams: List[tuple] = []
+    for obj in pdf.objects:
+        try:
+            objgen = getattr(obj, "objgen", None)
+            if objgen is not None and objgen != (0, 0):
+                if objgen in seen:
+                    continue
+                seen.add(objgen)
+
+            if isinstance(obj, pikepdf.Stream):
+                streams.append((obj, bytes(obj.read_bytes())))
+            elif isinstance(obj, pikepdf.Dictionary):
+                for k in list(obj.keys()):
+                    if str(k) in ("/JS", "/JavaScript"):
                         del obj[k]
                         removed.append("JS")
                         stats["js"] = stats.get("js", 0) + 1
-                    except Exception:
-                        pass
-                else:
-                    _strip_js_anywhere(obj[k], removed, stats)
-        elif isinstance(obj, list):
-            for v in obj:
-                _strip_js_anywhere(v, removed, stats)
-    except Exception:
-        pass
+        except Exception:
+            continue
 
-def _keyword_scrub_text(s: str, tokens: List[str]) -> str:
-    lower = s.lower()
-    out = s
-    # chunk into batches to keep regex manageable
-    BATCH = 200
-    for i in range(0, len(tokens), BATCH):
-        chunk = tokens[i:i+BATCH]
-        rx = re.compile("|".join(re.escape(t) for t in chunk if t), re.IGNORECASE)
-        out = rx.sub("", out)
-        lower = out.lower()
-    return out
-
-def _scrub_bytes_keywords(data: bytes, tokens: List[str]) -> bytes:
+    # Scrub stream bytes: fan out to the process pool for stream-heavy
+    # documents (scrub_bytes_keywords is pure and picklable), keep the
+    # set_stream writes serial — pikepdf objects stay on this process.
+    if (len(streams) >= _POOL_MIN_STREAMS
+            and sum(len(d) for _, d in streams) >= _POOL_MIN_BYTES):
+        try:
+            results = list(_scrub_pool().map(
+                scrub_bytes_keywords, [d for _, d in streams], chunksize=8))
+        except Exception:
+            results = [scrub_bytes_keywords(d) for _, d in streams]
+    else:
+        results = [scrub_bytes_keywords(d) for _, d in streams]
+    for (obj, data), new in zip(streams, results):
+        try:
+            if new != data:
+                obj.set_stream(new)
+        except Exception:
+            continue
+
+    # Scrub strings in place (best effort). The old recursive version built a
+    # brand-new pikepdf.Dictionary for every node — libqpdf object creation
+    # is the expensive part — even when no string changed; this walk only
+    # assigns back the individual values that actually differ, and the
+    # objgen-keyed visited set keeps shared indirect objects to one visit.
     try:
-        s = data.decode("latin-1", errors="ignore")
-        s2 = _keyword_scrub_text(s, tokens)
-        return s2.encode("latin-1", errors="ignore")
+        stack = [pdf.root]
+        visited = set()
+        while stack:
+            o = stack.pop()
+            try:
+                objgen = getattr(o, "objgen", None)
+                if objgen is not None and objgen != (0, 0):
+                    if objgen in visited:
+                        continue
+                    visited.add(objgen)
+
+                if isinstance(o, pikepdf.Dictionary):
+                    for k, v in list(o.items()):
+                        if isinstance(v, pikepdf.String):
+                            s = str(v)
+                            s2 = keyword_scrub_text(s)
+                            if s2 != s:
+                                o[k] = pikepdf.String(s2)
+                        else:
+                            stack.append(v)
+                elif isinstance(o, pikepdf.Array):
+                    for i, v in enumerate(o):
+                        if isinstance(v, pikepdf.String):
+                            s = str(v)
+                            s2 = keyword_scrub_text(s)
+                            if s2 != s:
+                                o[i] = pikepdf.String(s2)
+                        else:
+                            stack.append(v)
+            except Exception:
+                continue
     except Exception:
-        return data
+        pass
+
+def _sanitize_with_pikepdf(in_path: Path, out_path: Path,
+                           removed: List[str], stats: Dict[str, int]) -> None:
+    with pikepdf.open(str(in_path)) as pdf:
+        _pikepdf_clean(pdf, removed, stats)
+        pdf.save(str(out_path), rebuild_xref=True, linearize=False, static_id=False)
+
+# -------- PyPDF2 fallback --------
+def _sanitize_with_pypdf(src, removed: List[str], stats: Dict[str, int]) -> bytes:
+    """PyPDF2 rebuild; src is a path string or a binary file-like object."""
+    reader = PdfReader(src)
+    writer = PdfWriter()
+
+    # Catalog
+    root = reader.trailer.get("/Root", {})
+    if isinstance(root, dict):
+        if _drop_key(root, "/OpenAction", removed, "OpenAction"): stats["actions"] += 1
+        if _drop_key(root, "/AA", removed, "Catalog.AA"): stats["actions"] += 1
+        names = root.get("/Names", {})
+        if isinstance(names, dict):
+            if _drop_key(names, "/EmbeddedFiles", removed, "Names.EmbeddedFiles"):
+                stats["embedded_files"] += 1
+            if _drop_key(names, "/JavaScript", removed, "Names.JavaScript"):
+                stats["js"] += 1
+        acro = root.get("/AcroForm")
+        if isinstance(acro, dict):
+            _drop_key(acro, "/XFA", removed, "AcroForm.XFA")
+            _drop_key(acro, "/JS", removed, "AcroForm.JS"); stats["js"] += 1
+            _drop_key(acro, "/JavaScript", removed, "AcroForm.JavaScript"); stats["js"] += 1
+            _drop_key(acro, "/AA", removed, "AcroForm.AA"); stats["actions"] += 1
+            _drop_key(acro, "/NeedAppearances", removed, "AcroForm.NeedAppearances")
+            _drop_key(acro, "/Fields", removed, "AcroForm.Fields")
+        _drop_key(root, "/Outlines", removed, "Outlines")
+        _drop_key(root, "/PageLabels", removed, "PageLabels")
+
+    # Defense-in-depth
+    _strip_js_anywhere(reader.trailer, removed, stats)
+
+    # Pages
+    for page in reader.pages:
+        if _drop_key(page, "/AA", removed, "Page.AA"): stats["actions"] += 1
+        if _drop_key(page, "/RichMediaContent", removed, "Page.RichMediaContent"): stats["richmedia"] += 1
+        if "/Annots" in page:
+            try:
+                annots = page["/Annots"]
+                count = len(annots) if isinstance(annots, list) else 1
+                del page["/Annots"]
+                stats["annotations"] += count
+                removed.append(f"Annots({count})")
+            except Exception:
+                pass
+        writer.add_page(page)
+
+    # ViewerPreferences cleanup
+    if isinstance(root, dict):
+        vp = root.get("/ViewerPreferences", {})
+        if isinstance(vp, dict):
+            for k in list(vp.keys()):
+                try:
+                    del vp[k]
+                    removed.append(f"ViewerPreferences.{k.lstrip('/')}")
+                except Exception:
+                    pass
 
+    writer.add_metadata({"/Producer": "SafeDocs"})
+    buf = io.BytesIO()
+    writer.write(buf)
+    # Whole-buffer keyword scrub (no per-stream access without pikepdf)
+    return scrub_bytes_keywords(buf.getvalue())
 
 # -------- main --------
 def sanitize_pdf(in_path: str | Path, out_path: str | Path):
     in_path = Path(in_path); out_path = Path(out_path)
     removed: List[str] = []
     stats: Dict[str, int] = {"js": 0, "actions": 0, "annotations": 0, "embedded_files": 0, "richmedia": 0}
-    orig_bytes = in_path.read_bytes()
-    orig_sha = _sha256(orig_bytes)
+    # Stream the digest (hashlib.file_digest, 3.11+) instead of buffering the
+    # whole file just to hash it.
+    with open(in_path, "rb") as f:
+        orig_sha = hashlib.file_digest(f, "sha256").hexdigest()
 
     try:
-        reader = PdfReader(str(in_path))
-        writer = PdfWriter()
-
-        # Catalog
-        root = reader.trailer.get("/Root", {})
-        if isinstance(root, dict):
-            if _drop_key(root, "/OpenAction", removed, "OpenAction"): stats["actions"] += 1
-            if _drop_key(root, "/AA", removed, "Catalog.AA"): stats["actions"] += 1
-            names = root.get("/Names", {})
-            if isinstance(names, dict):
-                if _drop_key(names, "/EmbeddedFiles", removed, "Names.EmbeddedFiles"):
-                    stats["embedded_files"] += 1
-                if _drop_key(names, "/JavaScript", removed, "Names.JavaScript"):
-                    stats["js"] += 1
-            acro = root.get("/AcroForm")
-            if isinstance(acro, dict):
-                _drop_key(acro, "/XFA", removed, "AcroForm.XFA")
-                _drop_key(acro, "/JS", removed, "AcroForm.JS"); stats["js"] += 1
-                _drop_key(acro, "/JavaScript", removed, "AcroForm.JavaScript"); stats["js"] += 1
-                _drop_key(acro, "/AA", removed, "AcroForm.AA"); stats["actions"] += 1
-                _drop_key(acro, "/NeedAppearances", removed, "AcroForm.NeedAppearances")
-                _drop_key(acro, "/Fields", removed, "AcroForm.Fields")
-            _drop_key(root, "/Outlines", removed, "Outlines")
-            _drop_key(root, "/PageLabels", removed, "PageLabels")
-
-        # Defense-in-depth
-        _strip_js_anywhere(reader.trailer, removed, stats)
-
-        # Pages
-        for page in reader.pages:
-            if _drop_key(page, "/AA", removed, "Page.AA"): stats["actions"] += 1
-            if _drop_key(page, "/RichMediaContent", removed, "Page.RichMediaContent"): stats["richmedia"] += 1
-            if "/Annots" in page:
-                try:
-                    annots = page["/Annots"]
-                    count = len(annots) if isinstance(annots, list) else 1
-                    del page["/Annots"]
-                    stats["annotations"] += count
-                    removed.append(f"Annots({count})")
-                except Exception:
-                    pass
-            writer.add_page(page)
-
-        # ViewerPreferences cleanup
-        if isinstance(root, dict):
-            vp = root.get("/ViewerPreferences", {})
-            if isinstance(vp, dict):
-                for k in list(vp.keys()):
-                    try:
-                        del vp[k]
-                        removed.append(f"ViewerPreferences.{k.lstrip('/')}")
-                    except Exception:
-                        pass
-
-        # First pass write
-        writer.add_metadata({"/Producer": "SafeDocs"})
-        buf = io.BytesIO()
-        writer.write(buf)
-        buf.seek(0)
-        pdf_bytes = buf.read()
-
-        # Deep keyword scrub
         if pikepdf is not None:
             try:
-                with pikepdf.open(io.BytesIO(pdf_bytes)) as pdf:
-                    if "/Metadata" in pdf.root:
-                        del pdf.root["/Metadata"]; removed.append("Metadata")
-                    if "/Info" in pdf.trailer:
-                        del pdf.trailer["/Info"]; removed.append("Info")
-
-                    for obj in list(pdf.objects):
-                        try:
-                            if isinstance(obj, pikepdf.Stream):
-                                data = bytes(obj.read_bytes())
-                                new = _scrub_bytes_keywords(data, EXPANDED_TERMS)
-                                if new != data:
-                                    obj.set_stream(new)
-                        except Exception:
-                            continue
-
-                    # scrub strings recursively (best effort)
-                    def _scrub_obj(o):
-                        try:
-                            if isinstance(o, pikepdf.String):
-                                s = str(o)
-                                s2 = _keyword_scrub_text(s, EXPANDED_TERMS)
-                                if s2 != s:
-                                    return pikepdf.String(s2)
-                            elif isinstance(o, pikepdf.Array):
-                                return pikepdf.Array([_scrub_obj(x) for x in o])
-                            elif isinstance(o, pikepdf.Dictionary):
-                                d = pikepdf.Dictionary()
-                                for k, v in o.items():
-                                    d[k] = _scrub_obj(v)
-                                return d
-                        except Exception:
-                            pass
-                        return o
-                    try:
-                        pdf.root = _scrub_obj(pdf.root)
-                    except Exception:
-                        pass
-
-                    out_io = io.BytesIO()
-                    pdf.save(out_io, rebuild_xref=True, linearize=False, static_id=False)
-                    pdf_bytes = out_io.getvalue()
+                _sanitize_with_pikepdf(in_path, out_path, removed, stats)
             except Exception:
-                pdf_bytes = _scrub_bytes_keywords(pdf_bytes, EXPANDED_TERMS)
+                out_path.write_bytes(_sanitize_with_pypdf(str(in_path), removed, stats))
         else:
-            pdf_bytes = _scrub_bytes_keywords(pdf_bytes, EXPANDED_TERMS)
-
-        out_path.write_bytes(pdf_bytes)
+            out_path.write_bytes(_sanitize_with_pypdf(str(in_path), removed, stats))
 
         # Guarantee change
-        if _sha256(pdf_bytes) == orig_sha:
-            with open(out_path, "ab") as f:
-                f.write(b"\n% SafeDocs sanitized\n")
+        with open(out_path, "rb") as f:
+            if hashlib.file_digest(f, "sha256").hexdigest() == orig_sha:
+                with open(out_path, "ab") as fa:
+                    fa.write(b"\n% SafeDocs sanitized\n")
 
         return {
             "status": "ok",
@@ -331,12 +353,20 @@ def sanitize_pdf(in_path: str | Path, out_path: str | Path):
         return {"status": "failed", "sanitized_file": str(out_path), "removed": [], "notes": [], "stats": {}, "error": str(e)}
 
 def sanitize_pdf_bytes(data: bytes) -> bytes:
-    import tempfile
-    with tempfile.TemporaryDirectory() as td:
-        ip = Path(td) / "in.pdf"; op = Path(td) / "out.pdf"
-        ip.write_bytes(data)
-        res = sanitize_pdf(ip, op)
+    # Fully in-memory: pikepdf and PyPDF2 both accept file-like objects, so
+    # the API hot path never touches the filesystem.
+    removed: List[str] = []
+    stats: Dict[str, int] = {"js": 0, "actions": 0, "annotations": 0, "embedded_files": 0, "richmedia": 0}
+    if pikepdf is not None:
         try:
-            return Path(res.get("sanitized_file", op)).read_bytes()
+            dst = io.BytesIO()
+            with pikepdf.open(io.BytesIO(data)) as pdf:
+                _pikepdf_clean(pdf, removed, stats)
+                pdf.save(dst, rebuild_xref=True, linearize=False, static_id=False)
+            return dst.getvalue()
         except Exception:
-            return data
+            pass
+    try:
+        return _sanitize_with_pypdf(io.BytesIO(data), removed, stats)
+    except Exception:
+        return data
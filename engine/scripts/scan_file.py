@@ -1,5 +1,6 @@
 from __future__ import annotations
 import argparse, json, os, shutil, hashlib, datetime
+from functools import lru_cache
 from pathlib import Path
 
 from features_runtime import build_features_for_lgbm
@@ -14,16 +15,32 @@ from report_utils import (
     shap_top, nlg_explain, confidence
 )
 
+# Model/embedder loads are the slow part of a scan; cache them per process so
+# repeated in-process scans (API workers, batch runs) pay the cost once.
+@lru_cache(maxsize=1)
+def _cached_models(models_dir_str: str):
+    models_dir = Path(models_dir_str)
+    try: lgbm = load_lgbm(models_dir)
+    except Exception: lgbm = None
+    try: rf, et, rf_order = load_rf(models_dir)
+    except Exception: rf, et, rf_order = None, None, []
+    feat_order = load_feature_order(models_dir) or load_feat_order(models_dir)
+    return lgbm, rf, et, rf_order, feat_order
+
+@lru_cache(maxsize=1)
+def _cached_embedder():
+    from embedder import FrozenMiniLM
+    return FrozenMiniLM()
+
 def _dl_prob(models_dir: Path, file_path: Path, meta: dict) -> float:
     try:
-        from embedder import FrozenMiniLM
         from text_extract import extract_text
     except Exception:
         return 0.0
     try:
         txt = extract_text(str(file_path)) or ""
         if not txt.strip(): return 0.0
-        vec = FrozenMiniLM().encode([txt])[0]
+        vec = _cached_embedder().encode_texts([txt])[0]
         mlp = (Path(models_dir)/"mlp_head.pt")
         if not mlp.exists(): return 0.0
         return float(dl_prob_from_emb(mlp, vec))
@@ -68,9 +85,10 @@ def _sanitize(src: Path, out_clean_dir: Path):
     return dst.name, info
 
 def _human_size(n:int) -> str:
-    units=["B","KB","MB","GB"]; i=0; x=float(n)
-    while x>=1024 and i<len(units)-1: x/=1024; i+=1
-    return f"{x:.2f} {units[i]}"
+    # bit_length picks the unit directly; no divide-loop
+    units=["B","KB","MB","GB"]
+    i = min(len(units)-1, max(0, (int(n).bit_length()-1)//10))
+    return f"{n/(1<<(i*10)):.2f} {units[i]}"
 
 def main():
     ap = argparse.ArgumentParser()
@@ -90,11 +108,7 @@ def main():
     except Exception: feats, meta = {}, {}
 
     # models
-    try: lgbm = load_lgbm(models_dir)
-    except Exception: lgbm = None
-    try: rf, et, rf_order = load_rf(models_dir)
-    except Exception: rf, et, rf_order = None, None, []
-    feat_order = load_feature_order(models_dir) or load_feat_order(models_dir)
+    lgbm, rf, et, rf_order, feat_order = _cached_models(str(models_dir))
 
     # probs
     try: p_lgbm = lgbm_prob(lgbm, feats, feat_order) if lgbm else 0.0
@@ -117,10 +131,11 @@ def main():
         mime = src.suffix.lower().lstrip('.') or "application/octet-stream"
     sha256 = None
     try:
-        import hashlib; h = hashlib.sha256()
-        with open(src,"rb") as f:
-            for ch in iter(lambda: f.read(8192), b""): h.update(ch)
-        sha256 = h.hexdigest()
+        # file_digest streams inside OpenSSL's C loop; the sanitize step reads
+        # the same file right after, served from the OS page cache
+        import hashlib
+        with open(src, "rb") as f:
+            sha256 = hashlib.file_digest(f, "sha256").hexdigest()
     except Exception: pass
 
     # suspicious snippets
@@ -0,0 +1,309 @@
+"""
+SafeDocs shared keyword-scrub machinery.
+
+Single home for the ~150 seed terms, the >= 5,000-variant expansion, and the
+compiled scrub passes that were previously duplicated verbatim in
+sanitize_pdf.py, sanitize_ooxml.py and sanitize_rtf.py. Importing from here
+means expand_terms() and the pattern compilation run exactly once per process
+instead of once per sanitizer module.
+"""
+
+from __future__ import annotations
+import hashlib, itertools, os, pickle, re, random
+from pathlib import Path
+from typing import List
+
+# Optional single-pass multi-pattern matcher for the keyword scrub
+try:
+    import ahocorasick  # type: ignore
+except Exception:
+    ahocorasick = None
+
+# Optional JIT'd multi-pattern DFA (multi-GB/s block-mode scanning); x86-only
+# wheel, so it is a best-effort accelerator on top of the automaton path
+try:
+    import hyperscan  # type: ignore
+except Exception:
+    hyperscan = None
+
+# ---------------- Keyword expansion (→ >= 5,000 variants) ----------------
+BASE_TERMS: List[str] = [
+    # JS/actions (PDF)
+    "javascript", "/js", "/javascript", "openaction", "submitform", "launch", "gotoR", "named", "action",
+    "richmedia", "embeddedfile", "embeddedfiles", "acroform", "xfa", "needappearances",
+    "doc.exportdataobject", "util.printf", "app.launchurl", "this.submitform", "geturl",
+    # Office/LOLBins / typical malware strings
+    "macro", "vba", "vbaproject", "ole", "activex", "dde", "ddeauto", "includepicture", "includetext",
+    "hyperlink", "attachedtemplate",
+    # URLs/schemes
+    "http://", "https://", "javascript:", "file:", "data:", "ftp://", "smb://",
+    # LOLBAS/windows & tools
+    "cmd", "cmd.exe", "powershell", "powershell.exe", "wscript", "wscript.exe", "cscript", "cscript.exe",
+    "mshta", "mshta.exe", "regsvr32", "regsvr32.exe", "rundll32", "rundll32.exe", "bitsadmin", "certutil",
+    "curl", "wget", "ftp", "tftp", "schtasks", "at.exe", "whoami", "net user", "net group",
+    # Enc/JS tricks
+    "base64", "eval", "fromcharcode", "unescape",
+    # file types/executables
+    ".exe", ".ps1", ".vbs", ".js", ".jse", ".bat", ".cmd", ".hta", ".dll",
+]
+
+# A few extra families to widen coverage
+EXTRA_FAMILIES = [
+    "dropper", "payload", "beacon", "c2", "shellcode", "maldoc", "phish", "obfuscate", "decode",
+    "invoke-expression", "iex", "downloadstring", "add-type", "new-object system.net.webclient",
+    "start-process", "write-host", "set-mppreference", "amsienable",
+]
+
+LEET_MAP = {
+    "a": ["a", "4", "@"], "e": ["e", "3"], "i": ["i", "1", "!"],
+    "o": ["o", "0"], "s": ["s", "5", "$"], "t": ["t", "7"]
+}
+SEP_VARIANTS = ["", ".", "_", "-", "\u200b"]
+PREFIXES = ["", "/", "\\"]          # PDF keys, escapes
+SUFFIXES = ["", "()", ":", ";", "'", '"']
+TLDs = ["com", "net", "org", "io", "ru", "cn", "xyz"]
+EXTS = [".exe",".ps1",".vbs",".js",".jse",".bat",".cmd",".hta",".dll",".scr",".com",".pif",".lnk"]
+
+def _leetify(token: str, cap: int = 10) -> List[str]:
+    # Long seeds (URLs, full command lines) are not realistic leet targets and
+    # their substitution space explodes; keep them verbatim.
+    if sum(ch.isalpha() for ch in token) > 12:
+        return [token]
+    # Lazy Cartesian product: product() yields tuples without materializing
+    # intermediate prefix lists, and islice stops after cap results.
+    pools = [LEET_MAP.get(ch.lower(), [ch]) for ch in token]
+    return ["".join(combo) for combo in itertools.islice(itertools.product(*pools), cap)]
+
+def _path_forms(token: str) -> List[str]:
+    tk = token.strip("/").lower()
+    forms = [
+        f"{tk}", f"/{tk}", f"\\{tk}", f"{tk}/", f"{tk}\\", f"/{tk}/", f"\\{tk}\\",
+        f"{tk}.php", f"{tk}.asp", f"{tk}.aspx", f"{tk}.jsp"
+    ]
+    for tld in TLDs:
+        forms.append(f"{tk}.{tld}")
+        forms.append(f"www.{tk}.{tld}")
+        forms.append(f"http://{tk}.{tld}")
+        forms.append(f"https://{tk}.{tld}")
+    for ext in EXTS:
+        forms.append(f"{tk}{ext}")
+    return forms
+
+def expand_terms(min_count: int = 5000) -> List[str]:
+    seeds = set(BASE_TERMS + EXTRA_FAMILIES)
+    expanded = set()
+    # every seed's cheap core forms land here and are exempt from both the
+    # generation budget and the final cap: a budget that starves late seeds
+    # would silently drop whole families from the scrub vocabulary
+    guaranteed = set()
+    # prefix/suffix pairs are seed-independent; materialize them once
+    affixes = list(itertools.product(PREFIXES, SUFFIXES))
+    # Generating far past the cap only to throw variants away is pure import-
+    # time waste; once the budget is met, only the combinatorial affix/leet
+    # expansion stops — the per-seed core forms keep accumulating
+    budget = int(min_count * 1.2)
+    # Core variants (sorted: set order varies per process under hash
+    # randomization, and with the budget cut-off that would change which
+    # seeds get the full expansion)
+    for t in sorted(seeds):
+        t = t.strip()
+        if not t: continue
+        base = set([t, t.lower(), t.upper()])
+        guaranteed.update(base)
+        # compacted form
+        guaranteed.add(re.sub(r"[\/\.\-\s]+", "", t))
+        # path/URL/exe style forms
+        expanded.update(_path_forms(t))
+        if len(expanded) >= budget:
+            continue
+        if re.search(r"[a-zA-Z]", t):
+            base.update(_leetify(t, cap=8))
+        # separator/prefix/suffix variants: the sep substitution only matters
+        # for seeds containing spaces, so compute each core form once instead
+        # of once per (pre, suf) pair, then batch-update the set
+        for cv in base:
+            cores = {cv.replace(" ", sep) for sep in SEP_VARIANTS} if " " in cv else (cv,)
+            expanded.update(pre + core + suf for core in cores for pre, suf in affixes)
+    expanded |= guaranteed
+    # If still below target, add n-gram slices of longer tokens
+    if len(expanded) < min_count:
+        for t in sorted(seeds):
+            tt = re.sub(r"[^a-z0-9]", "", t.lower())
+            for i in range(0, max(0, len(tt)-3)):
+                expanded.add(tt[i:i+4])
+                if len(expanded) >= min_count: break
+            if len(expanded) >= min_count: break
+    # Bound overall size for performance. The guaranteed core forms always
+    # make the cut; the remainder is a seeded shuffle over a sorted snapshot:
+    # diversity without lexicographic bias, and the surviving term set is
+    # identical in every process (the old unseeded shuffle made the scrub
+    # vocabulary differ run to run).
+    core = sorted(x for x in guaranteed if x)
+    rest = sorted(x for x in (expanded - guaranteed) if x)
+    random.Random(0x5AFED0C5).shuffle(rest)
+    cap = max(min_count, 5000)
+    return core + rest[: max(0, cap - len(core))]
+
+# bump when expand_terms' logic changes: the cache signature below only sees
+# the seed tables, so logic fixes need an explicit version to invalidate
+_EXPANSION_VERSION = 2
+
+def _terms_cache_path(min_count: int) -> Path:
+    # Signature over everything the expansion depends on, so editing any seed
+    # table invalidates the cache automatically
+    sig = hashlib.sha256(repr((_EXPANSION_VERSION, BASE_TERMS, EXTRA_FAMILIES,
+                               LEET_MAP, SEP_VARIANTS,
+                               PREFIXES, SUFFIXES, TLDs, EXTS, min_count)).encode()).hexdigest()[:16]
+    base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / "safedocs" / f"terms_{sig}.pkl"
+
+def load_expanded_terms(min_count: int = 6000) -> List[str]:
+    """Load the expanded term list from the on-disk cache, or compute and cache it.
+
+    Regenerating 6k variants is pure cold-start tax for every worker process;
+    unpickling the finished list is near-instant. Cache misses and unwritable
+    cache dirs just fall back to computing in-process.
+    """
+    cache = _terms_cache_path(min_count)
+    try:
+        with open(cache, "rb") as f:
+            terms = pickle.load(f)
+        if isinstance(terms, list) and len(terms) >= min_count:
+            return terms
+    except Exception:
+        pass
+    # longest first so alternation patterns (leftmost-first in re) remove a
+    # whole long variant before one of its substrings can win
+    terms = sorted(expand_terms(min_count=min_count), key=len, reverse=True)
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_name(f"{cache.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(terms, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache)  # atomic: concurrent workers never see partial files
+    except Exception:
+        pass
+    return terms
+
+EXPANDED_TERMS = load_expanded_terms(min_count=6000)  # ≥ 6000 tokens
+
+# ---------------- Compiled scrub passes ----------------
+def compile_scrub_patterns(tokens: List[str], batch: int = 200) -> List[re.Pattern[bytes]]:
+    """Compile the token list into batched bytes-patterns (latin-1, case-insensitive)."""
+    patterns = []
+    for i in range(0, len(tokens), batch):
+        chunk = [t.encode("latin-1", errors="ignore") for t in tokens[i:i+batch] if t]
+        if chunk:
+            patterns.append(re.compile(b"|".join(re.escape(t) for t in chunk), re.IGNORECASE))
+    return patterns
+
+SCRUB_RX = compile_scrub_patterns(EXPANDED_TERMS)
+
+def build_scrub_automaton(tokens: List[str]):
+    """One Aho-Corasick automaton over all (lowercased) tokens, or None."""
+    if ahocorasick is None:
+        return None
+    auto = ahocorasick.Automaton()
+    for t in tokens:
+        tl = t.lower()
+        if tl:
+            auto.add_word(tl, len(tl))
+    auto.make_automaton()
+    return auto
+
+SCRUB_AC = build_scrub_automaton(EXPANDED_TERMS)
+
+def build_scrub_hsdb(tokens: List[str]):
+    """Compile all tokens into one Hyperscan literal database, or None.
+
+    Returns (db, lengths) — Hyperscan only reports end offsets without the
+    SOM flag, so match starts are recovered from the per-pattern lengths.
+    """
+    if hyperscan is None:
+        return None
+    try:
+        pats = [t.encode("latin-1", errors="ignore") for t in tokens if len(t) >= 2]
+        db = hyperscan.Database()
+        db.compile(expressions=pats, ids=list(range(len(pats))),
+                   flags=[hyperscan.HS_FLAG_CASELESS] * len(pats), literal=True)
+        return db, [len(p) for p in pats]
+    except Exception:
+        return None
+
+SCRUB_HS = build_scrub_hsdb(EXPANDED_TERMS)
+
+# First bytes of every expanded term, as one character class. A part that
+# contains none of them (large base64/media blobs mostly) cannot match any
+# term, so one cheap C-level search skips the multi-pattern scan entirely.
+_TRIGGER_RX = re.compile(
+    b"[" + re.escape(bytes(sorted({t.encode("latin-1", "ignore")[0] for t in EXPANDED_TERMS if t}))) + b"]",
+    re.IGNORECASE)
+
+def scrub_bytes_keywords(data: bytes) -> bytes:
+    """Neutralize every expanded term in a bytes buffer, length-preserving.
+
+    Both paths break each matched keyword by overwriting its second byte with
+    '_' in a single bytearray copy of the input — no per-match Python callback
+    (the C-to-Python transition dominates re.sub with callables) and no buffer
+    rebuild per batch.
+    """
+    try:
+        if _TRIGGER_RX.search(data) is None:
+            return data
+        buf = bytearray(data)
+        if SCRUB_HS is not None:
+            db, lens = SCRUB_HS
+            def _on_match(pid, frm, to, flags, ctx):
+                buf[to - lens[pid] + 1] = 0x5F  # '_'
+            db.scan(data, match_event_handler=_on_match)
+        elif SCRUB_AC is not None:
+            # Single pass over one automaton. latin-1 is 1:1 with bytes, so
+            # automaton offsets map straight onto the buffer.
+            for end, ln in SCRUB_AC.iter(data.decode("latin-1").lower()):
+                if ln >= 2:
+                    buf[end - ln + 2] = 0x5F  # '_'
+        else:
+            for rx in SCRUB_RX:
+                for m in rx.finditer(data):
+                    s, e = m.span()
+                    if e - s >= 2:
+                        buf[s + 1] = 0x5F  # '_'
+        return bytes(buf)
+    except Exception:
+        return data
+
+def compile_text_patterns(tokens: List[str], batch: int = 200) -> List[re.Pattern[str]]:
+    """str-mode twin of compile_scrub_patterns, batched for regex-size sanity."""
+    patterns = []
+    for i in range(0, len(tokens), batch):
+        chunk = [t for t in tokens[i:i+batch] if t]
+        if chunk:
+            patterns.append(re.compile("|".join(re.escape(t) for t in chunk), re.IGNORECASE))
+    return patterns
+
+# Compiled once at import: keyword_scrub_text used to re-escape and re-compile
+# all ~30 batch patterns on every call, i.e. per PDF string / RTF document
+_TEXT_SCRUB_RX = compile_text_patterns(EXPANDED_TERMS)
+
+def keyword_scrub_text(s: str, tokens: List[str] | None = None) -> str:
+    """Remove every expanded term from a str (used for pikepdf strings/RTF text)."""
+    if tokens is None and SCRUB_AC is not None:
+        # One automaton pass instead of 30 alternation passes: collect match
+        # spans, merge overlaps, and splice the survivors back together.
+        spans = sorted((end - ln + 1, end + 1) for end, ln in SCRUB_AC.iter(s.lower()))
+        if not spans:
+            return s
+        out = []
+        pos = 0
+        for start, end in spans:
+            if start > pos:
+                out.append(s[pos:start])
+            if end > pos:
+                pos = end
+        out.append(s[pos:])
+        return "".join(out)
+    patterns = _TEXT_SCRUB_RX if tokens is None else compile_text_patterns(tokens)
+    out = s
+    for rx in patterns:
+        out = rx.sub("", out)
+    return out
@@ -1,11 +1,19 @@
 #!/usr/bin/env python3
-import argparse
+import argparse, os, pickle
+
+# Must run before torch/MKL load: their thread pools are sized at import and
+# some builds default to a single intra-op thread on CPU
+os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count() or 1))
+os.environ.setdefault("MKL_NUM_THREADS", str(os.cpu_count() or 1))
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import torch
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import DataLoader, TensorDataset
 
 from embedder import FrozenMiniLM
 from mlp_head import MLPHead
@@ -42,18 +50,14 @@ def load_manifest(path: Path) -> pd.DataFrame:
             f"Required columns are: sha256, label, file_path (+ optional 'split')."
         )
 
-    # label -> 0/1
+    # label -> 0/1 (categorize once, then test codes: one pass over the
+    # unique values instead of a chain of full-column string Series)
     if df["label"].dtype == object:
-        df["label"] = (
-            df["label"]
-            .astype(str)
-            .str.strip()
-            .str.lower()
-            .isin(["1", "true", "malicious", "yes"])
-            .astype(int)
-        )
+        cats = pd.Categorical(df["label"].astype(str).str.strip().str.lower())
+        truthy = np.flatnonzero(cats.categories.isin(["1", "true", "malicious", "yes"]))
+        df["label"] = np.isin(cats.codes, truthy).astype(np.int8)
     else:
-        df["label"] = pd.to_numeric(df["label"], errors="coerce").fillna(0).astype(int)
+        df["label"] = pd.to_numeric(df["label"], errors="coerce").fillna(0).astype(np.int8)
 
     # ensure 'split'
     if "split" not in df.columns:
@@ -67,31 +71,113 @@ def load_manifest(path: Path) -> pd.DataFrame:
     return df[["sha256", "label", "file_path", "split"]]
 
 
-class EmbDS(Dataset):
-    """On-the-fly MiniLM embeddings dataset (robust to empty/unreadable files)."""
-
-    def __init__(self, rows):
-        self.rows = rows
-        self.encoder = FrozenMiniLM()
-
-    def __len__(self):
-        return len(self.rows)
-
-    def __getitem__(self, i):
-        sha, y, fpath = self.rows[i]
-        f = Path(fpath)
-        # extract text (empty -> zero vector so training never crashes)
+def _extract_one(fpath) -> str:
+    """Text for one file (empty on failure so embedding never crashes)."""
+    try:
+        return extract_text_for_embed(Path(fpath)) or ""
+    except Exception:
+        return ""
+
+
+def extract_all_texts(paths) -> list[str]:
+    """Extract text for all paths through a process pool.
+
+    forkserver workers start from a clean interpreter, so they never inherit
+    the parent's torch/MiniLM state; serial fallback if pools are unusable.
+    """
+    try:
+        ctx = multiprocessing.get_context("forkserver")
+    except ValueError:
+        ctx = None
+    try:
+        with ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                 mp_context=ctx) as ex:
+            return list(ex.map(_extract_one, paths, chunksize=32))
+    except Exception:
+        return [_extract_one(p) for p in paths]
+
+
+def embed_rows(rows, encoder: FrozenMiniLM) -> tuple[np.ndarray, np.ndarray]:
+    """Embed all rows up front into an (N, 384) float32 matrix + labels.
+
+    Extraction is parse-bound, so it fans out to a process pool; encoding
+    runs length-sorted so each MiniLM batch pads to similar lengths instead
+    of the longest outlier. Empty texts keep a zero vector.
+    """
+    texts = extract_all_texts([fpath for _, _, fpath in rows])
+
+    X = np.zeros((len(rows), 384), dtype="float32")
+    idx = sorted((i for i, t in enumerate(texts) if t.strip()),
+                 key=lambda i: len(texts[i]))
+    if idx:
+        embs = encoder.encode_texts([texts[i] for i in idx], batch_size=64)
+        X[idx] = embs.astype("float32")
+    y = np.asarray([y for _, y, _ in rows], dtype="float32")
+    return X, y
+
+
+def embed_rows_cached(rows, encoder: FrozenMiniLM, cache_dir: Path) -> tuple[np.ndarray, np.ndarray]:
+    """embed_rows with a sha256-keyed on-disk cache.
+
+    Embeddings are deterministic per content hash, so re-runs (and every
+    epoch beyond the first training run) only encode hashes not yet in
+    emb_cache.npy. The cache is a memmapped (N, 384) float32 array with a
+    pickled sha256 -> row sidecar; both are replaced atomically on update.
+    """
+    cache_dir = Path(cache_dir)
+    npy_path = cache_dir / "emb_cache.npy"
+    idx_path = cache_dir / "emb_cache.pkl"
+
+    cache, index = None, {}
+    if npy_path.exists() and idx_path.exists():
         try:
-            text = extract_text_for_embed(f)
+            with open(idx_path, "rb") as f:
+                index = pickle.load(f)
+            cache = np.load(npy_path, mmap_mode="r")
         except Exception:
-            text = ""
-        emb = self.encoder.encode_text(text) if text else np.zeros((384,), dtype="float32")
-        return emb.astype("float32"), np.float32(y)
+            cache, index = None, {}
+
+    # one row per new hash, even if the manifest repeats it
+    missing = list({sha: (sha, y, fp) for sha, y, fp in rows
+                    if sha not in index}.values())
+    if missing or cache is None:
+        X_new, _ = embed_rows(missing, encoder) if missing else (
+            np.zeros((0, 384), dtype="float32"), None)
+        n_old = cache.shape[0] if cache is not None else 0
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = npy_path.with_suffix(f".{os.getpid()}.tmp.npy")
+        mm = np.lib.format.open_memmap(tmp, mode="w+", dtype="float32",
+                                       shape=(n_old + len(missing), 384))
+        if n_old:
+            mm[:n_old] = cache
+        for j, (sha, _, _) in enumerate(missing):
+            index[sha] = n_old + j
+            mm[n_old + j] = X_new[j]
+        mm.flush()
+        del mm
+        os.replace(tmp, npy_path)
+        tmp_idx = idx_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_idx, "wb") as f:
+            pickle.dump(index, f)
+        os.replace(tmp_idx, idx_path)
+        cache = np.load(npy_path, mmap_mode="r")
+
+    X = np.asarray(cache[[index[sha] for sha, _, _ in rows]], dtype="float32")
+    y = np.asarray([y for _, y, _ in rows], dtype="float32")
+    return X, y
 
 
 # -------------------- main --------------------
 
 def main():
+    # MiniLM encoding is matmul-bound; give intra-op all cores (extraction
+    # runs in its own process pool, not torch threads)
+    try:
+        torch.set_num_threads(os.cpu_count() or 1)
+        torch.set_num_interop_threads(2)
+    except Exception:
+        pass
+
     parser = argparse.ArgumentParser()
     parser.add_argument("--manifest", default=str(_default_manifest_path()),
                         help="Path to manifest file (manifest.csv or manifest). "
@@ -122,12 +208,42 @@ def main():
     if len(tr_rows) == 0 or len(va_rows) == 0:
         raise SystemExit(f"Not enough data after split. Train={len(tr_rows)} Val={len(va_rows)}")
 
-    dl_tr = DataLoader(EmbDS(tr_rows), batch_size=args.batch, shuffle=True, num_workers=0)
-    dl_va = DataLoader(EmbDS(va_rows), batch_size=args.batch, shuffle=False, num_workers=0)
+    # Embed everything once up front; the epochs then run pure tensor ops
+    # over the cached (N, 384) matrix instead of re-extracting every file
+    encoder = FrozenMiniLM()
+    cache_dir = mani.parent
+    X_tr, y_tr = embed_rows_cached(tr_rows, encoder, cache_dir)
+    X_va, y_va = embed_rows_cached(va_rows, encoder, cache_dir)
 
     device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = MLPHead().to(device)
-    opt = torch.optim.AdamW(model.parameters(), lr=args.lr, weight_decay=1e-2)
+
+    ds_tr = TensorDataset(torch.from_numpy(X_tr), torch.from_numpy(y_tr))
+    ds_va = TensorDataset(torch.from_numpy(X_va), torch.from_numpy(y_va))
+    # drop_last keeps every training batch the same shape, so the compiled
+    # graph below never hits a shape-guard recompile on a partial batch —
+    # but only when there is at least one full batch, else the loop would
+    # silently run zero steps and save random weights as "best";
+    # pinned host memory lets the H2D copies below run async
+    dl_tr = DataLoader(ds_tr, batch_size=args.batch, shuffle=True,
+                       drop_last=len(ds_tr) >= args.batch,
+                       pin_memory=(device == "cuda"))
+    dl_va = DataLoader(ds_va, batch_size=args.batch, shuffle=False,
+                       pin_memory=(device == "cuda"))
+    base_model = MLPHead().to(device)
+    model = base_model
+    # Static 384-dim input + fixed batch: ideal torch.compile target; fuses
+    # the small Linear/ReLU kernels (best effort on older torch builds)
+    try:
+        model = torch.compile(base_model, mode="reduce-overhead", dynamic=False)
+    except Exception:
+        pass
+    # fused (CUDA) / foreach (CPU) AdamW batches the per-parameter update
+    # kernels; fall back for torch builds without either flag
+    try:
+        opt = torch.optim.AdamW(model.parameters(), lr=args.lr, weight_decay=1e-2,
+                                **({"fused": True} if device == "cuda" else {"foreach": True}))
+    except (RuntimeError, TypeError):
+        opt = torch.optim.AdamW(model.parameters(), lr=args.lr, weight_decay=1e-2)
     lossf = torch.nn.BCEWithLogitsLoss()
 
     best = None
@@ -138,9 +254,13 @@ def main():
         # train
         model.train()
         for x, y in dl_tr:
-            x, y = x.to(device), y.to(device)
-            opt.zero_grad()
-            loss = lossf(model(x), y)
+            x = x.to(device, non_blocking=True)
+            y = y.to(device, non_blocking=True)
+            opt.zero_grad(set_to_none=True)
+            # bf16 halves activation bytes on Ampere+; no-op on CPU
+            with torch.autocast("cuda", dtype=torch.bfloat16,
+                                enabled=(device == "cuda")):
+                loss = lossf(model(x), y)
             loss.backward()
             opt.step()
 
@@ -150,7 +270,8 @@ def main():
         n = 0
         with torch.no_grad():
             for x, y in dl_va:
-                x, y = x.to(device), y.to(device)
+                x = x.to(device, non_blocking=True)
+                y = y.to(device, non_blocking=True)
                 v = lossf(model(x), y).item()
                 tot += v * x.size(0)
                 n += x.size(0)
@@ -162,7 +283,9 @@ def main():
             best, bad = vloss, 0
             out_p = Path(args.out)
             out_p.parent.mkdir(parents=True, exist_ok=True)
-            torch.save(model.state_dict(), out_p)
+            # save the plain module so the checkpoint keys carry no
+            # torch.compile _orig_mod. prefix
+            torch.save(base_model.state_dict(), out_p)
         else:
             bad += 1
             if bad >= patience:
@@ -6,6 +6,15 @@ import pandas as pd
 import json
 from pathlib import Path
 
+try:
+    import orjson
+    def _dumps(obj) -> bytes:
+        # OPT_SERIALIZE_NUMPY handles the numpy scalars to_dict can leave in
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
 print("=" * 60)
 print("SafeDocs Dataset Preparation")
 print("=" * 60)
@@ -20,9 +29,20 @@ json_malware_dir = Path("SafeDocs_Datasets_ML/safedocs_dataset/raw/json_features
 json_benign_dir.mkdir(parents=True, exist_ok=True)
 json_malware_dir.mkdir(parents=True, exist_ok=True)
 
+def read_csv_fast(path):
+    """Multi-threaded CSV load via pyarrow; pandas' C parser as fallback."""
+    try:
+        from pyarrow import csv as pacsv
+        table = pacsv.read_csv(
+            str(path),
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=16 << 20))
+        return table.to_pandas()
+    except Exception:
+        return pd.read_csv(path)
+
 print("\n[1/3] Loading CSV files...")
-df_benign = pd.read_csv(csv_benign)
-df_malware = pd.read_csv(csv_malware)
+df_benign = read_csv_fast(csv_benign)
+df_malware = read_csv_fast(csv_malware)
 
 print(f"   Benign samples: {len(df_benign)}")
 print(f"   Malware samples: {len(df_malware)}")
@@ -37,46 +57,39 @@ df_malware_sampled = df_malware.sample(n=sample_size, random_state=42)
 print(f"   Benign (sampled): {len(df_benign_sampled)}")
 print(f"   Malware (sampled): {len(df_malware_sampled)}")
 
-def convert_to_json(row, output_dir, label):
-    """Convert a CSV row to JSON feature file"""
-    # Create feature dict (skip non-numeric columns)
-    features = {}
-    for col in row.index:
-        if col in ['type', 'hash']:
-            continue
-        try:
-            val = float(row[col])
-            features[col] = val
-        except:
-            pass
-    
-    # Use hash as filename (or generate one if missing)
-    file_hash = str(row.get('hash', f"sample_{label}_{len(list(output_dir.glob('*.json')))}"))
-    
-    # Write JSON
-    json_path = output_dir / f"{file_hash}.json"
-    with open(json_path, 'w') as f:
-        json.dump({"features": features}, f)
-
-print("\n[3/3] Converting to JSON format...")
-count = 0
-for _, row in df_benign_sampled.iterrows():
-    convert_to_json(row, json_benign_dir, "benign")
-    count += 1
-    if count % 100 == 0:
-        print(f"   Processed {count} benign samples...")
-
-count = 0
-for _, row in df_malware_sampled.iterrows():
-    convert_to_json(row, json_malware_dir, "malware")
-    count += 1
-    if count % 100 == 0:
-        print(f"   Processed {count} malware samples...")
+def convert_to_jsonl(df, output_dir, label):
+    """Convert a sampled frame to one JSON-lines feature file per class.
+
+    One file instead of thousands: per-sample files paid an open/create/close
+    per row and the trainer paid the same again reading them back.
+    """
+    # Coerce the whole frame once instead of float()/try per cell; NaN marks
+    # the values that were non-numeric and gets dropped per record below
+    num_df = df.drop(columns=['type', 'hash'], errors='ignore').apply(
+        pd.to_numeric, errors='coerce')
+    records = num_df.to_dict(orient='records')
+
+    if 'hash' in df.columns:
+        names = df['hash'].astype(str).tolist()
+    else:
+        names = [f"sample_{label}_{i}" for i in range(len(df))]
+
+    out_path = output_dir / f"{label}.jsonl"
+    with open(out_path, 'wb') as f:
+        for i, (name, rec) in enumerate(zip(names, records), start=1):
+            features = {k: v for k, v in rec.items() if pd.notna(v)}
+            f.write(_dumps({"hash": name, "features": features}) + b"\n")
+            if i % 500 == 0:
+                print(f"   Processed {i} {label} samples...")
+    return out_path, len(records)
+
+print("\n[3/3] Converting to JSON-lines format...")
+benign_path, n_benign = convert_to_jsonl(df_benign_sampled, json_benign_dir, "benign")
+malware_path, n_malware = convert_to_jsonl(df_malware_sampled, json_malware_dir, "malware")
 
 print(f"\n✅ Dataset ready!")
-print(f"   Location: SafeDocs_Datasets_ML/safedocs_dataset/raw/json_features/")
-print(f"   Benign: {len(list(json_benign_dir.glob('*.json')))} files")
-print(f"   Malicious: {len(list(json_malware_dir.glob('*.json')))} files")
+print(f"   Benign: {n_benign} samples -> {benign_path}")
+print(f"   Malicious: {n_malware} samples -> {malware_path}")
 print("\n" + "=" * 60)
 print("Ready for training! Run: py train_model_from_json.py")
 print("=" * 60)
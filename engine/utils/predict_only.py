@@ -46,16 +46,16 @@ def _maybe_bootstrap():
     def _pip(*args): subprocess.check_call([str(vpy), "-m", "pip", *args])
     _pip("install", "--upgrade", "pip", "setuptools", "wheel")
     _pip("install", "--only-binary=:all:", "--prefer-binary",
-         "numpy", "pandas", "scikit-learn", "lightgbm", "joblib")
+         "numpy", "scikit-learn", "lightgbm", "joblib")
     os.execv(str(vpy), [str(vpy)] + sys.argv)
 
 _ensure_64bit()
 _maybe_bootstrap()
 
 # ----- Third-party imports -----
+# numpy is cheap and used throughout; joblib is deferred to main() so --help
+# and argument errors never pay its import cost
 import numpy as np
-import pandas as pd
-import joblib
 import argparse
 
 SUPPORTED_EXTS = {".pdf", ".docx", ".xlsx", ".pptx", ".rtf", ".xls"}
@@ -71,6 +71,41 @@ PDF_TOKENS = {
     "has_openaction": [b"/OpenAction", b"/AA"],
 }
 
+# Optional single-pass multi-token counter (same accelerator the sanitizers
+# use); the bytes.count fallbacks below stay for plain installs
+try:
+    import ahocorasick  # type: ignore
+except Exception:
+    ahocorasick = None
+
+_PDF_COUNT_TOKENS = [b"/JS", b"/JavaScript", b"/OpenAction", b"/AA", b"/URI",
+                     b"/GoToR", b"/EmbeddedFile", b"/EmbeddedFiles",
+                     b" obj", b"stream", b"xref"]
+_RTF_COUNT_TOKENS = [b"\\objdata", b"\\object", b"\\field", b"\\pict", b"\\link"]
+
+def _build_counter_automaton(tokens):
+    """Index-tagged automaton; latin-1 text maps 1:1 onto the raw bytes."""
+    if ahocorasick is None:
+        return None
+    auto = ahocorasick.Automaton()
+    for i, tok in enumerate(tokens):
+        auto.add_word(tok.decode("latin-1"), i)
+    auto.make_automaton()
+    return auto
+
+_PDF_AC = _build_counter_automaton(_PDF_COUNT_TOKENS)
+_RTF_AC = _build_counter_automaton(_RTF_COUNT_TOKENS)
+_SUSP_AC = _build_counter_automaton(OFFICE_SUSP_TOKENS)
+
+def _count_tokens(data: bytes, auto, n: int):
+    """Per-token counts over one linear scan; None when the automaton is."""
+    if auto is None:
+        return None
+    counts = [0] * n
+    for _, i in auto.iter(data.decode("latin-1")):
+        counts[i] += 1
+    return counts
+
 def safe_read_bytes(p: Path, max_bytes=MAX_BYTES) -> bytes:
     try:
         with open(p, "rb") as f:
@@ -79,20 +114,41 @@ def safe_read_bytes(p: Path, max_bytes=MAX_BYTES) -> bytes:
         return b""
 
 def entropy(b: bytes) -> float:
+    # 256-bucket histogram in C + one short vector log2 instead of a Counter
+    # and a math.log2 call per distinct byte
     if not b: return 0.0
-    cnt = Counter(b); n = len(b); e = 0.0
-    for c in cnt.values():
-        p = c / n
-        if p: e -= p * math.log2(p)
-    return float(e)
+    arr = np.frombuffer(b, dtype=np.uint8)
+    c = np.bincount(arr, minlength=256)
+    p = c[c > 0] / len(arr)
+    return -float((p * np.log2(p)).sum())
 
 def chunk_entropy_p95(b: bytes, chunk=4096) -> float:
+    # All chunks in one shot: offset-encoding the chunk index into the byte
+    # value lets a single bincount produce every per-chunk histogram, so a
+    # 6 MB file is two C passes instead of ~1500 Python entropy() calls
     if not b: return 0.0
-    vals = [entropy(b[i:i+chunk]) for i in range(0, len(b), chunk)]
-    return float(np.percentile(vals, 95)) if vals else 0.0
+    arr = np.frombuffer(b, dtype=np.uint8)
+    n = len(arr)
+    n_chunks = (n + chunk - 1) // chunk
+    idx = np.arange(n, dtype=np.int32) // chunk
+    hist = np.bincount(idx * 256 + arr, minlength=n_chunks * 256).reshape(n_chunks, 256)
+    lens = np.diff(np.minimum(np.arange(n_chunks + 1, dtype=np.int64) * chunk, n))
+    p = hist / lens[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ent = -np.where(p > 0, p * np.log2(p), 0.0).sum(axis=1)
+    return float(np.percentile(ent, 95))
+
+# compiled once; finditer counts without materializing the match list
+_URL_RE = re.compile(r"https?://[^\s\\]+", re.IGNORECASE)
+_URL_RE_B = re.compile(rb"https?://[^\s\\]+", re.IGNORECASE)
 
 def count_urls_text(text: str) -> int:
-    return len(re.findall(r"https?://[^\s\\]+", text, flags=re.IGNORECASE))
+    return sum(1 for _ in _URL_RE.finditer(text))
+
+def count_urls_bytes(data: bytes) -> int:
+    # match over raw bytes: decoding a 6 MB binary buffer to str just to
+    # count URLs doubled memory and added a full decode pass
+    return sum(1 for _ in _URL_RE_B.finditer(data))
 
 def is_ole_cfb(b: bytes) -> bool:
     return b.startswith(b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1")
@@ -112,28 +168,37 @@ def extract_features_ooxml(data: bytes) -> Dict[str, float]:
     }
     try:
         with zipfile.ZipFile(io.BytesIO(data)) as z:
-            members = z.namelist()
-            feats["zip_member_count"] = len(members)
-            macro_bytes = b""
-            for name in members:
-                ln = name.lower()
+            # classify names once up front; only the macro and markup parts
+            # are worth a read (CRC + decompress per member)
+            infos = z.infolist()
+            feats["zip_member_count"] = len(infos)
+            macro_infos = []
+            xml_infos = []
+            for info in infos:
+                ln = info.filename.lower()
                 if ln.endswith("vba/vba.pcode") or ln.endswith("vbaproject.bin") or "/vba" in ln or "vbaproject" in ln:
-                    try: macro_bytes += z.read(name)
-                    except: pass
-                if any(ln.startswith(p) for p in ["word/embeddings/", "ppt/embeddings/", "xl/embeddings/"]):
+                    macro_infos.append(info)
+                if ln.startswith(("word/embeddings/", "ppt/embeddings/", "xl/embeddings/")):
                     feats["ole_object_count"] += 1
                 if ("activex" in ln) or ("control" in ln): feats["has_activex"] = 1
                 if ln.endswith((".xml", ".rels", ".vml")):
-                    try:
-                        xmlb = z.read(name)
-                        feats["token_CreateObject"] += int(xmlb.count(b"CreateObject"))
-                        feats["token_Shell"] += int(xmlb.count(b"Shell"))
-                        feats["token_WScript"] += int(xmlb.count(b"WScript"))
-                        text = xmlb.decode("utf-8", errors="ignore")
-                        feats["url_count"] += count_urls_text(text)
-                        if ("classid" in text.lower()) or ("activex" in text.lower()):
-                            feats["has_activex"] = 1
-                    except: pass
+                    xml_infos.append(info)
+            macro_chunks = []
+            for info in macro_infos:
+                try: macro_chunks.append(z.read(info))
+                except: pass
+            for info in xml_infos:
+                try:
+                    xmlb = z.read(info)
+                    feats["token_CreateObject"] += int(xmlb.count(b"CreateObject"))
+                    feats["token_Shell"] += int(xmlb.count(b"Shell"))
+                    feats["token_WScript"] += int(xmlb.count(b"WScript"))
+                    feats["url_count"] += count_urls_bytes(xmlb)
+                    lb = xmlb.lower()
+                    if (b"classid" in lb) or (b"activex" in lb):
+                        feats["has_activex"] = 1
+                except: pass
+            macro_bytes = b"".join(macro_chunks)
             if macro_bytes:
                 feats["macro_size"] = len(macro_bytes)
                 feats["macro_entropy_p95"] = chunk_entropy_p95(macro_bytes, 2048)
@@ -151,13 +216,24 @@ def extract_features_pdf(data: bytes) -> Dict[str, float]:
     }
     if not data.startswith(b"%PDF"):
         return feats
-    feats["pdf_has_js"] = int(any(tok in data for tok in PDF_TOKENS["has_js"]))
-    feats["pdf_has_openaction"] = int(any(tok in data for tok in PDF_TOKENS["has_openaction"]))
-    feats["pdf_uri_count"] = int(data.count(b"/URI") + data.count(b"/GoToR"))
-    feats["pdf_embedded_file_count"] = int(data.count(b"/EmbeddedFile") + data.count(b"/EmbeddedFiles"))
-    feats["pdf_object_count"] = int(data.count(b" obj"))
-    feats["pdf_stream_count"] = int(data.count(b"stream"))
-    feats["pdf_xref_count"] = int(data.count(b"xref"))
+    counts = _count_tokens(data, _PDF_AC, len(_PDF_COUNT_TOKENS))
+    if counts is not None:
+        # one sweep instead of ~10 full-buffer .count scans
+        feats["pdf_has_js"] = int(counts[0] + counts[1] > 0)
+        feats["pdf_has_openaction"] = int(counts[2] + counts[3] > 0)
+        feats["pdf_uri_count"] = counts[4] + counts[5]
+        feats["pdf_embedded_file_count"] = counts[6] + counts[7]
+        feats["pdf_object_count"] = counts[8]
+        feats["pdf_stream_count"] = counts[9]
+        feats["pdf_xref_count"] = counts[10]
+    else:
+        feats["pdf_has_js"] = int(any(tok in data for tok in PDF_TOKENS["has_js"]))
+        feats["pdf_has_openaction"] = int(any(tok in data for tok in PDF_TOKENS["has_openaction"]))
+        feats["pdf_uri_count"] = int(data.count(b"/URI") + data.count(b"/GoToR"))
+        feats["pdf_embedded_file_count"] = int(data.count(b"/EmbeddedFile") + data.count(b"/EmbeddedFiles"))
+        feats["pdf_object_count"] = int(data.count(b" obj"))
+        feats["pdf_stream_count"] = int(data.count(b"stream"))
+        feats["pdf_xref_count"] = int(data.count(b"xref"))
     feats["pdf_entropy_p95"] = chunk_entropy_p95(data, 4096)
     return feats
 
@@ -169,16 +245,22 @@ def extract_features_rtf(data: bytes) -> Dict[str, float]:
     }
     if not data.strip().startswith(b"{\\rtf"):
         return feats
-    feats["rtf_objdata_count"] = int(data.count(b"\\objdata"))
-    feats["rtf_object_count"] = int(data.count(b"\\object"))
-    feats["rtf_field_count"] = int(data.count(b"\\field"))
-    feats["rtf_pict_count"] = int(data.count(b"\\pict"))
-    feats["rtf_link_count"] = int(data.count(b"\\link"))
+    counts = _count_tokens(data, _RTF_AC, len(_RTF_COUNT_TOKENS))
+    if counts is not None:
+        feats["rtf_objdata_count"] = counts[0]
+        feats["rtf_object_count"] = counts[1]
+        feats["rtf_field_count"] = counts[2]
+        feats["rtf_pict_count"] = counts[3]
+        feats["rtf_link_count"] = counts[4]
+    else:
+        feats["rtf_objdata_count"] = int(data.count(b"\\objdata"))
+        feats["rtf_object_count"] = int(data.count(b"\\object"))
+        feats["rtf_field_count"] = int(data.count(b"\\field"))
+        feats["rtf_pict_count"] = int(data.count(b"\\pict"))
+        feats["rtf_link_count"] = int(data.count(b"\\link"))
     feats["rtf_js_like"] = int(b"javascript" in data.lower())
     feats["rtf_shell_like"] = int(b"shell" in data.lower() or b"cmd.exe" in data.lower())
-    try: text = data.decode("latin-1", errors="ignore")
-    except: text = ""
-    feats["rtf_url_count"] = count_urls_text(text)
+    feats["rtf_url_count"] = count_urls_bytes(data)
     if b"\\objdata" in data and (b"Package" in data or b"D0CF" in data.upper()):
         feats["rtf_has_ole_packager_hint"] = 1
     feats["rtf_entropy_p95"] = chunk_entropy_p95(data, 4096)
@@ -191,17 +273,21 @@ def extract_features_xls_ole(data: bytes) -> Dict[str, float]:
         feats["xls_vba_token_count"] = int(data.count(b"VBA") + data.count(b"Attribute VB_Name"))
     return feats
 
-def extract_features_for_file(path: Path, ext: str) -> Dict[str, float]:
-    data = safe_read_bytes(path, MAX_BYTES)
+def extract_features_for_file(path: Path, ext: str, st_size: int | None = None,
+                              data: bytes | None = None) -> Dict[str, float]:
+    if data is None:
+        data = safe_read_bytes(path, MAX_BYTES)
+    # callers pass the st_size they already stat'ed; the len(data) fallback
+    # undercounts files larger than MAX_BYTES
     feats = {
-        "file_size": path.stat().st_size if path.exists() else len(data),
+        "file_size": st_size if st_size is not None else len(data),
         "entropy_p95": chunk_entropy_p95(data, 4096),
-        "suspicious_token_count": int(sum(data.count(tok) for tok in OFFICE_SUSP_TOKENS)),
+        "suspicious_token_count": int(
+            sum(1 for _ in _SUSP_AC.iter(data.decode("latin-1"))) if _SUSP_AC is not None
+            else sum(data.count(tok) for tok in OFFICE_SUSP_TOKENS)),
         "url_count_general": 0,
     }
-    try: text = data.decode("utf-8", errors="ignore")
-    except: text = ""
-    feats["url_count_general"] = count_urls_text(text)
+    feats["url_count_general"] = count_urls_bytes(data)
     feats.update(ext_onehots(ext))
     if ext in {".docx", ".xlsx", ".pptx"}:
         feats.update(extract_features_ooxml(data))
@@ -220,44 +306,72 @@ def two_col_proba(estimator, X: np.ndarray) -> np.ndarray:
     pos = np.clip(P[:, 0], 0.0, 1.0)
     return np.stack([1 - pos, pos], axis=1)
 
+# tag rules as data instead of an if-ladder: (feature keys OR'd together, tag)
+_TAG_RULES = (
+    (("vba_module_count", "macro_size"), "VBA macros detected"),
+    (("has_activex",), "ActiveX controls"),
+    (("ole_object_count", "rtf_has_ole_packager_hint"), "Embedded OLE objects"),
+    (("token_CreateObject", "token_Shell", "token_WScript"), "Suspicious automation APIs"),
+    (("pdf_has_js",), "PDF JavaScript"),
+    (("pdf_has_openaction",), "Auto-execute action"),
+)
+_URL_KEYS = ("url_count", "url_count_general", "pdf_uri_count", "rtf_url_count")
+# each group bumps severity at most once, however many of its tags fired
+_SEV_BUMPS = (
+    (("Auto-execute action", "PDF JavaScript", "ActiveX controls"), 0.2),
+    (("VBA macros detected",), 0.1),
+    (("Embedded OLE objects",), 0.1),
+)
+_SANITIZE_TAGS = ("VBA macros detected", "PDF JavaScript", "Embedded OLE objects")
+
 def derive_tags_and_severity(feats: Dict[str, float], prob: float):
     tags = []
-    if feats.get("vba_module_count", 0) > 0 or feats.get("macro_size", 0) > 0: tags.append("VBA macros detected")
-    if feats.get("has_activex", 0) > 0: tags.append("ActiveX controls")
-    if feats.get("ole_object_count", 0) > 0 or feats.get("rtf_has_ole_packager_hint", 0) > 0: tags.append("Embedded OLE objects")
-    if feats.get("token_CreateObject", 0) > 0 or feats.get("token_Shell", 0) > 0 or feats.get("token_WScript", 0) > 0: tags.append("Suspicious automation APIs")
-    if feats.get("pdf_has_js", 0) > 0: tags.append("PDF JavaScript")
-    if feats.get("pdf_has_openaction", 0) > 0: tags.append("Auto-execute action")
-    total_urls = feats.get("url_count", 0) + feats.get("url_count_general", 0) + feats.get("pdf_uri_count", 0) + feats.get("rtf_url_count", 0)
+    for keys, tag in _TAG_RULES:
+        if any(feats.get(k, 0) > 0 for k in keys):
+            tags.append(tag)
+    total_urls = sum(feats.get(k, 0) for k in _URL_KEYS)
     if total_urls > 10: tags.append("Unusually many links")
     elif total_urls > 0: tags.append("Contains links")
     sev = float(prob)
-    if any(t in tags for t in ["Auto-execute action","PDF JavaScript","ActiveX controls"]): sev = min(1.0, sev + 0.2)
-    if "VBA macros detected" in tags: sev = min(1.0, sev + 0.1)
-    if "Embedded OLE objects" in tags: sev = min(1.0, sev + 0.1)
+    for group, bump in _SEV_BUMPS:
+        if any(t in tags for t in group): sev = min(1.0, sev + bump)
     severity = int(round(sev * 100))
-    sanitize = severity >= 40 or any(t in tags for t in ["VBA macros detected","PDF JavaScript","Embedded OLE objects"])
+    sanitize = severity >= 40 or any(t in tags for t in _SANITIZE_TAGS)
     return tags, severity, sanitize
 
 # ---- Type guessing for files with NO extension ----
-def guess_ext_from_bytes(path: Path) -> str | None:
-    b = safe_read_bytes(path, 32 * 1024)
-    if b.startswith(b"%PDF"): return ".pdf"
-    if b.strip().startswith(b"{\\rtf"): return ".rtf"
-    if b[:8] == b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1": return ".xls"  # OLE CFB
+def guess_ext_from_data(data: bytes, path: Path) -> str | None:
+    """Guess from an already-read buffer; only re-touches the file when the
+    zip central directory lies beyond the read cap."""
+    if data.startswith(b"%PDF"): return ".pdf"
+    if data.strip().startswith(b"{\\rtf"): return ".rtf"
+    if data[:8] == b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1": return ".xls"  # OLE CFB
     # Try OOXML (zip with content types)
     try:
-        with zipfile.ZipFile(path) as z:
-            names = set(z.namelist())
+        try:
+            z = zipfile.ZipFile(io.BytesIO(data))
+        except Exception:
+            z = zipfile.ZipFile(path)  # truncated buffer; central dir at EOF
+        with z:
+            names = z.namelist()
             if "[Content_Types].xml" in names:
-                if any(n.startswith("word/") for n in names): return ".docx"
-                if any(n.startswith("xl/") for n in names): return ".xlsx"
-                if any(n.startswith("ppt/") for n in names): return ".pptx"
+                # one pass over the namelist instead of three any() scans
+                has_word = has_xl = has_ppt = False
+                for n in names:
+                    if n.startswith("word/"): has_word = True; break  # top priority
+                    elif n.startswith("xl/"): has_xl = True
+                    elif n.startswith("ppt/"): has_ppt = True
+                if has_word: return ".docx"
+                if has_xl: return ".xlsx"
+                if has_ppt: return ".pptx"
                 return ".docx"
     except Exception:
         pass
     return None
 
+def guess_ext_from_bytes(path: Path) -> str | None:
+    return guess_ext_from_data(safe_read_bytes(path, MAX_BYTES), path)
+
 # ===== CLI =====
 def autodetect_model_dir(cli: str | None) -> Path:
     if cli:
@@ -275,45 +389,72 @@ def autodetect_model_dir(cli: str | None) -> Path:
             return c
     raise SystemExit("[ERROR] Could not find models directory. Pass --model-dir.")
 
-def main():
-    ap = argparse.ArgumentParser(description="SafeDocs predict-only CLI")
-    ap.add_argument("--file", required=True, help="Path to a single file (.pdf/.docx/.xlsx/.pptx/.rtf/.xls)")
-    ap.add_argument("--model-dir", default=None, help="Folder containing lightgbm_calibrated.pkl and feature_cols.json")
-    args = ap.parse_args()
+class BoosterPredictor:
+    """Raw lightgbm Booster + optional interp calibration curve.
+
+    Mimics predict_proba so the rest of the pipeline is agnostic to
+    whether the joblib bundle or the exported model.txt was loaded.
+    """
+    def __init__(self, booster, cal_x=None, cal_y=None):
+        self._booster = booster
+        self._cal_x = cal_x
+        self._cal_y = cal_y
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        pos = np.asarray(self._booster.predict(X), dtype=np.float64).reshape(-1)
+        if self._cal_x is not None:
+            pos = np.interp(pos, self._cal_x, self._cal_y)
+        pos = np.clip(pos, 0.0, 1.0)
+        return np.stack([1.0 - pos, pos], axis=1)
+
+def load_predictor(mdir: Path):
+    """Load model bundle + feature order once; amortized across many files."""
+    cols_path = mdir / "feature_cols.json"
+    if not cols_path.exists():
+        raise SystemExit(f"[ERROR] Missing model artifacts in {mdir}")
+    feature_cols: List[str] = json.loads(cols_path.read_text(encoding="utf-8"))
+    # prefer the exported Booster text file (see scripts/export_booster.py):
+    # no joblib unpickle, no sklearn wrapper graph
+    txt_path = mdir / "model.txt"
+    if txt_path.exists():
+        try:
+            import lightgbm
+            booster = lightgbm.Booster(model_file=str(txt_path))
+            cal_x = cal_y = None
+            cal_path = mdir / "calibration.json"
+            if cal_path.exists():
+                cal = json.loads(cal_path.read_text(encoding="utf-8"))
+                cal_x = np.asarray(cal["x"], dtype=np.float64)
+                cal_y = np.asarray(cal["y"], dtype=np.float64)
+            return BoosterPredictor(booster, cal_x, cal_y), feature_cols
+        except Exception:
+            pass
+    bundle_path = mdir / "lightgbm_calibrated.pkl"
+    if not bundle_path.exists():
+        raise SystemExit(f"[ERROR] Missing model artifacts in {mdir}")
+    import joblib
+    bundle = joblib.load(bundle_path)
+    predictor = bundle.get("calibrator") or bundle["model"]
+    return predictor, feature_cols
 
-    fpath = Path(args.file).resolve()
-    if not fpath.exists():
-        raise SystemExit(f"[ERROR] File not found: {fpath}. If the path contains spaces, keep it in quotes.")
+def _resolve_ext(fpath: Path, data: bytes | None = None) -> str:
     ext = fpath.suffix.lower()
-
     if ext == "":
-        guessed = guess_ext_from_bytes(fpath)
+        guessed = (guess_ext_from_data(data, fpath) if data is not None
+                   else guess_ext_from_bytes(fpath))
         if guessed:
             ext = guessed
         else:
-            raise SystemExit("[ERROR] Unsupported extension: file has no extension and type could not be guessed. "
-                             "Rename with a proper extension like .pdf/.docx/.xlsx/.pptx/.rtf/.xls.")
-
+            raise ValueError("file has no extension and type could not be guessed; "
+                             "rename with a proper extension like .pdf/.docx/.xlsx/.pptx/.rtf/.xls")
     if ext not in SUPPORTED_EXTS:
-        raise SystemExit(f"[ERROR] Unsupported extension: {ext}. Supported: {', '.join(sorted(SUPPORTED_EXTS))}")
-
-    mdir = autodetect_model_dir(args.model_dir)
-    bundle_path = mdir / "lightgbm_calibrated.pkl"
-    cols_path = mdir / "feature_cols.json"
-    if not bundle_path.exists() or not cols_path.exists():
-        raise SystemExit(f"[ERROR] Missing model artifacts in {mdir}")
+        raise ValueError(f"unsupported extension: {ext}. Supported: {', '.join(sorted(SUPPORTED_EXTS))}")
+    return ext
 
-    bundle = joblib.load(bundle_path)
-    feature_cols: List[str] = json.loads(cols_path.read_text(encoding="utf-8"))
-    predictor = bundle.get("calibrator") or bundle["model"]
-
-    feats = extract_features_for_file(fpath, ext)
-    feats_aligned = {c: feats.get(c, -1) for c in feature_cols}
-    X = pd.DataFrame([feats_aligned])[feature_cols].values
-    prob = float(two_col_proba(predictor, X)[:, 1][0])
+def _verdict(feats: Dict[str, float], prob: float, fpath: Path) -> dict:
     pred = int(prob >= 0.5)
     tags, severity, sanitize = derive_tags_and_severity(feats, prob)
-    out = {
+    return {
         "file": str(fpath),
         "prediction": pred,
         "prob_malicious": prob,
@@ -325,6 +466,108 @@ def main():
             "pdf_has_js","pdf_has_openaction","suspicious_token_count"
         ]}
     }
+
+def predict_one(predictor, feature_cols: List[str], fpath: Path,
+                st_size: int | None = None) -> dict:
+    # one stat, one read; type guess and extraction share both
+    if st_size is None:
+        st_size = os.stat(fpath).st_size
+    data = safe_read_bytes(fpath, MAX_BYTES)
+    ext = _resolve_ext(fpath, data)
+    feats = extract_features_for_file(fpath, ext, st_size=st_size, data=data)
+    # align straight into a float32 row; a one-row DataFrame just to order
+    # columns dominated inference wall time
+    X = np.fromiter((feats.get(c, -1.0) for c in feature_cols),
+                    dtype=np.float32, count=len(feature_cols)).reshape(1, -1)
+    prob = float(two_col_proba(predictor, X)[:, 1][0])
+    return _verdict(feats, prob, fpath)
+
+def _iter_batch_paths(batch_file: str):
+    if batch_file == "-":
+        yield from (line.strip() for line in sys.stdin)
+    else:
+        with open(batch_file, "r", encoding="utf-8") as f:
+            yield from (line.strip() for line in f)
+
+def _extract_wrapper(raw: str):
+    """Worker-side resolve + type-check + feature extraction."""
+    fpath = Path(raw).resolve()
+    try:
+        try:
+            st_size = os.stat(fpath).st_size
+        except OSError:
+            raise ValueError("file not found")
+        data = safe_read_bytes(fpath, MAX_BYTES)
+        ext = _resolve_ext(fpath, data)
+        return str(fpath), extract_features_for_file(fpath, ext, st_size=st_size, data=data), None
+    except Exception as e:
+        return str(fpath), None, str(e)
+
+def run_batch(predictor, feature_cols: List[str], batch_file: str) -> None:
+    """One JSON verdict per line; errors are reported per file, not fatal.
+
+    Extraction is independent per file, so it fans out to a process pool;
+    inference then runs as a single stacked predict_proba call (LightGBM
+    parallelizes trees across rows). Drive from a shell pipeline, e.g.
+      find dir -type f | python predict_only.py --batch-file - --model-dir models
+    """
+    paths = [raw for raw in _iter_batch_paths(batch_file) if raw]
+    if not paths:
+        return
+
+    results = None
+    if len(paths) > 1:
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=os.cpu_count() or 1) as ex:
+                results = list(ex.map(_extract_wrapper, paths, chunksize=8))
+        except Exception:
+            results = None
+    if results is None:
+        results = [_extract_wrapper(raw) for raw in paths]
+
+    ok = [(p, feats) for p, feats, _ in results if feats is not None]
+    probs = iter(())
+    if ok:
+        X = np.empty((len(ok), len(feature_cols)), dtype=np.float32)
+        for i, (_, feats) in enumerate(ok):
+            X[i] = np.fromiter((feats.get(c, -1.0) for c in feature_cols),
+                               dtype=np.float32, count=len(feature_cols))
+        probs = iter(two_col_proba(predictor, X)[:, 1])
+
+    for p, feats, err in results:
+        if feats is None:
+            out = {"file": p, "error": err}
+        else:
+            out = _verdict(feats, float(next(probs)), Path(p))
+        print(json.dumps(out), flush=True)
+
+def main():
+    ap = argparse.ArgumentParser(description="SafeDocs predict-only CLI")
+    ap.add_argument("--file", help="Path to a single file (.pdf/.docx/.xlsx/.pptx/.rtf/.xls)")
+    ap.add_argument("--batch-file", help="File with one path per line ('-' for stdin); model loads once for all of them")
+    ap.add_argument("--model-dir", default=None, help="Folder containing lightgbm_calibrated.pkl and feature_cols.json")
+    args = ap.parse_args()
+
+    if not args.file and not args.batch_file:
+        ap.error("one of --file or --batch-file is required")
+
+    mdir = autodetect_model_dir(args.model_dir)
+    predictor, feature_cols = load_predictor(mdir)
+
+    if args.batch_file:
+        run_batch(predictor, feature_cols, args.batch_file)
+        return
+
+    fpath = Path(args.file).resolve()
+    try:
+        st_size = os.stat(fpath).st_size
+    except OSError:
+        raise SystemExit(f"[ERROR] File not found: {fpath}. If the path contains spaces, keep it in quotes.")
+    try:
+        out = predict_one(predictor, feature_cols, fpath, st_size)
+    except ValueError as e:
+        raise SystemExit(f"[ERROR] {e}")
     print(json.dumps(out, indent=2))
 
 if __name__ == "__main__":